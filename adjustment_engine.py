@@ -0,0 +1,286 @@
+import math
+import numpy as np
+import cv2
+from PIL import Image
+
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+RGB_TO_YIQ = np.array([[0.299, 0.587, 0.114],
+                       [0.596, -0.274, -0.322],
+                       [0.211, -0.523, 0.312]], dtype=np.float32)
+YIQ_TO_RGB = np.linalg.inv(RGB_TO_YIQ).astype(np.float32)
+
+
+class AdjustmentEngine:
+    NAME = "numpy"
+    ORDER = ("brightness", "contrast", "saturation", "exposure", "shadows", "highlights",
+             "blacks", "whites", "hue", "temperature", "white_balance", "warmth")
+
+    def __init__(self, order=None, buffer=None):
+        self.order = tuple(order) if order else self.ORDER
+        self.buffer = buffer
+
+    @staticmethod
+    def hue_matrix(factor):
+        angle = math.radians(factor * 180)
+        cos, sin = math.cos(angle), math.sin(angle)
+        rotation = np.array([[1, 0, 0],
+                             [0, cos, -sin],
+                             [0, sin, cos]], dtype=np.float32)
+        return YIQ_TO_RGB @ rotation @ RGB_TO_YIQ
+
+    @staticmethod
+    def channel_gains(key, factor):
+        gains = np.ones(3, dtype=np.float32)
+        if key == "temperature":
+            if factor > 0:
+                gains[2], gains[0] = 1 + factor, 1 - factor * 0.5
+            else:
+                gains[0], gains[2] = 1 - factor, 1 + factor * 0.5
+        elif key == "white_balance":
+            gains[2], gains[0] = 1 + factor, 1 - factor
+        elif key == "warmth":
+            if factor > 0:
+                gains[2], gains[1] = 1 + factor, 1 + factor * 0.5
+            else:
+                gains[0], gains[1] = 1 - factor, 1 - factor * 0.5
+        return gains
+
+    def active(self, adjustments):
+        return [(key, float(adjustments.get(key, 0))) for key in self.order if adjustments.get(key, 0) != 0]
+
+    def compile(self, adjustments, channel_means=None):
+        program = []
+        matrix = np.eye(3, dtype=np.float32)
+        offset = np.zeros(3, dtype=np.float32)
+        linear = True
+
+        def flush():
+            if not np.array_equal(matrix, np.eye(3, dtype=np.float32)) or offset.any():
+                program.append(("affine", matrix.copy(), offset.copy()))
+
+        for key, factor in self.active(adjustments):
+            step_matrix = np.eye(3, dtype=np.float32)
+            step_offset = np.zeros(3, dtype=np.float32)
+            if key in ("brightness", "exposure"):
+                step_matrix *= 1 + factor
+            elif key == "contrast":
+                if not linear or channel_means is None:
+                    flush()
+                    program.append(("contrast", factor))
+                    matrix, offset = np.eye(3, dtype=np.float32), np.zeros(3, dtype=np.float32)
+                    continue
+                means = matrix @ channel_means + offset
+                mean = int(min(max(float(LUMA @ means), 0), 255) + 0.5)
+                step_matrix *= 1 + factor
+                step_offset += mean * -factor
+            elif key == "saturation":
+                step_matrix = (1 + factor) * step_matrix - factor * np.outer(np.ones(3, dtype=np.float32), LUMA)
+            elif key in ("shadows", "highlights"):
+                flush()
+                program.append((key, factor))
+                matrix, offset = np.eye(3, dtype=np.float32), np.zeros(3, dtype=np.float32)
+                linear = False
+                continue
+            elif key in ("blacks", "whites"):
+                step_offset += factor * 50
+            elif key == "hue":
+                step_matrix = self.hue_matrix(factor)
+            else:
+                step_matrix = np.diag(self.channel_gains(key, factor)).astype(np.float32)
+            matrix = step_matrix @ matrix
+            offset = step_matrix @ offset + step_offset
+        flush()
+        return program
+
+    def needs_means(self, adjustments):
+        return adjustments.get("contrast", 0) != 0
+
+    @staticmethod
+    def channel_means(array):
+        return np.array(cv2.mean(array)[:3], dtype=np.float32)
+
+    @staticmethod
+    def _affine(array, matrix, offset, out=None):
+        if np.count_nonzero(matrix - np.diag(np.diagonal(matrix))) == 0:
+            array = np.multiply(array, np.diagonal(matrix), out=array if out is None else out)
+        elif out is None:
+            array = (array.reshape(-1, 3) @ matrix.T).reshape(array.shape)
+        else:
+            np.matmul(array.reshape(-1, 3), matrix.T, out=out.reshape(-1, 3))
+            array = out
+        if offset.any():
+            array += offset
+        return array
+
+    def run(self, array, program):
+        for op in program:
+            kind = op[0]
+            if kind == "affine":
+                array = self._affine(array, op[1], op[2])
+            elif kind == "contrast":
+                mean = int(min(max(float(LUMA @ self.channel_means(array)), 0), 255) + 0.5)
+                array *= 1 + op[1]
+                array += mean * -op[1]
+            elif kind == "shadows":
+                np.putmask(array, array < 128, array * np.float32(1 + op[1]))
+            elif kind == "highlights":
+                np.putmask(array, array > 128, array * np.float32(1 + op[1]))
+        return array
+
+    @staticmethod
+    def op_key(op):
+        return (op[0],) + tuple(value.tobytes() if isinstance(value, np.ndarray) else value for value in op[1:])
+
+    def begin(self, array):
+        return array.astype(np.float32)
+
+    def step(self, work, op, fresh):
+        if fresh:
+            return self.run(work, [op])
+        if op[0] == "affine":
+            return self._affine(work, op[1], op[2], np.empty_like(work))
+        return self.run(work.copy(), [op])
+
+    def finish(self, work):
+        out = None if self.buffer is None else self.buffer.scratch("adjustments", work.shape)
+        return np.clip(work, 0, 255, out=out).astype(np.uint8)
+
+    def run_staged(self, array, program, cache, key):
+        keys = []
+        for op in program:
+            key = (key, self.op_key(op))
+            keys.append(key)
+        start, work = 0, None
+        for index in range(len(program), 0, -1):
+            work = cache.peek(keys[index - 1])
+            if work is not None:
+                start = index
+                break
+        if work is None:
+            work = self.begin(array)
+        for index in range(start, len(program)):
+            work = self.step(work, program[index], index == 0)
+            work.flags.writeable = False
+            cache.put(keys[index], work)
+        return self.finish(work)
+
+    def apply_array(self, array, adjustments, channel_means=None):
+        if channel_means is None and self.needs_means(adjustments):
+            channel_means = self.channel_means(array)
+        program = self.compile(adjustments, channel_means)
+        if not program:
+            return array
+        if self.buffer is None:
+            work = array.astype(np.float32)
+        else:
+            work = self.buffer.scratch("adjustments", array.shape)
+            np.copyto(work, array)
+        work = self.run(work, program)
+        np.clip(work, 0, 255, out=work)
+        return work.astype(np.uint8)
+
+    def apply(self, image, adjustments, channel_means=None):
+        if not self.active(adjustments):
+            return image
+        if self.buffer is None:
+            return Image.fromarray(self.apply_array(np.asarray(image), adjustments, channel_means))
+        return self.buffer.wrap(self.apply_array(self.buffer.view(image), adjustments, channel_means))
+
+
+class OpenCVAdjustmentEngine(AdjustmentEngine):
+    NAME = "opencv"
+    RAMP = np.repeat(np.arange(256, dtype=np.float32)[:, np.newaxis, np.newaxis], 3, axis=2)
+    CUBE = np.array([[r, g, b] for r in (0, 255) for g in (0, 255) for b in (0, 255)], dtype=np.float32)
+    BELOW = float(np.nextafter(np.float32(128), np.float32(0)))
+    TRUNCATE = np.float32(0.5 - 1 / 1024)
+    ROUNDING_GAIN = 1.01
+
+    @staticmethod
+    def pointwise(op):
+        return op[0] in ("shadows", "highlights") or \
+            (op[0] == "affine" and np.count_nonzero(op[1] - np.diag(np.diagonal(op[1]))) == 0)
+
+    def resolve(self, work, op):
+        if op[0] != "contrast":
+            return op
+        mean = int(min(max(float(LUMA @ self.channel_means(work)), 0), 255) + 0.5)
+        return ("affine", np.eye(3, dtype=np.float32) * np.float32(1 + op[1]),
+                np.full(3, mean * -op[1], dtype=np.float32))
+
+    def table(self, ops):
+        return np.clip(self.run(self.RAMP.copy(), ops), 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def gain(op):
+        if op[0] == "affine":
+            return float(np.abs(op[1]).sum(axis=1).max())
+        return abs(1 + op[1]) if op[0] == "contrast" else max(1.0, 1 + op[1])
+
+    def rounded(self, ops):
+        return any(op[0] in ("shadows", "highlights") for op in ops) or \
+            math.prod(map(self.gain, ops)) > self.ROUNDING_GAIN
+
+    def lossless(self, program):
+        for index, op in enumerate(program):
+            if op[0] != "affine" or self.pointwise(op):
+                continue
+            if index and self.rounded(program[index:]) or self.rounded(program[index + 1:]):
+                return False
+        for op in program[:-1]:
+            if op[0] == "contrast":
+                values = np.float32([0 if op[1] <= 0 else -1])
+            elif self.pointwise(op):
+                values = self.run(self.RAMP.copy(), [op])
+            else:
+                values = self.CUBE @ op[1].T + op[2]
+            if values.min() < 0 or values.max() > 255:
+                return False
+        return True
+
+    def step(self, work, op, fresh):
+        op = self.resolve(work, op)
+        if op[0] == "affine":
+            return cv2.transform(work, np.hstack([op[1], op[2][:, np.newaxis]]))
+        selected = None if self.buffer is None else self.buffer.scratch("selected", work.shape)
+        if op[0] == "shadows":
+            selected = cv2.threshold(work, self.BELOW, 0, cv2.THRESH_TOZERO_INV, dst=selected)[1]
+        else:
+            selected = cv2.threshold(work, 128, 0, cv2.THRESH_TOZERO, dst=selected)[1]
+        return cv2.scaleAdd(selected, op[1], work, dst=work if fresh else None)
+
+    def step8(self, work, op):
+        if self.pointwise(op):
+            return cv2.LUT(np.ascontiguousarray(work), self.table([op]))
+        return cv2.transform(work, np.hstack([op[1], op[2][:, np.newaxis] - self.TRUNCATE]))
+
+    def apply_array(self, array, adjustments, channel_means=None):
+        if channel_means is None and self.needs_means(adjustments):
+            channel_means = self.channel_means(array)
+        program = self.compile(adjustments, channel_means)
+        if not program:
+            return array
+        if not self.lossless(program):
+            if self.buffer is None:
+                work = self.begin(array)
+            else:
+                work = self.buffer.scratch("adjustments", array.shape)
+                np.copyto(work, array)
+            for op in program:
+                work = self.step(work, op, True)
+            return self.finish(work)
+        work, pending = array, []
+        for op in program:
+            op = self.resolve(work, op)
+            if self.pointwise(op):
+                pending.append(op)
+                continue
+            if pending:
+                work, pending = cv2.LUT(np.ascontiguousarray(work), self.table(pending)), []
+            work = self.step8(work, op)
+        if pending:
+            work = cv2.LUT(np.ascontiguousarray(work), self.table(pending))
+        return work
+
+
+BACKENDS = {engine.NAME: engine for engine in (AdjustmentEngine, OpenCVAdjustmentEngine)}
@@ -0,0 +1,119 @@
+import argparse
+import glob
+import json
+import os
+import time
+from multiprocessing import Pool
+from effects import Effects
+from image_processor import ImageProcessor
+from operation_graph import Operation
+from strip_executor import StripExecutor
+
+processor = None
+effect_chain = None
+preset_adjustments = None
+
+
+def load_preset(path):
+    with open(path, "r", encoding="utf-8") as f:
+        preset = json.load(f)
+    adjustments = preset.get("adjustments", {})
+    unknown = set(adjustments) - set(ImageProcessor().adjustments)
+    if unknown:
+        raise ValueError(f"Неизвестные настройки: {', '.join(sorted(unknown))}")
+    effects = []
+    for effect in preset.get("effects", []):
+        spec = Effects.find(effect["name"])
+        if spec is None:
+            raise ValueError(f"Неизвестный эффект: {effect['name']}")
+        effects.append((spec.name, list(spec.bind(effect.get("params", [])))))
+    order, backend = preset.get("order"), preset.get("backend")
+    validator = ImageProcessor()
+    validator.set_adjustment_order(order)
+    validator.set_adjustment_backend(backend)
+    return {"adjustments": adjustments, "effects": effects, "order": order, "backend": backend}
+
+
+def init_worker(preset, threads=1):
+    global processor, effect_chain, preset_adjustments
+    processor = ImageProcessor()
+    processor.set_adjustment_order(preset["order"])
+    processor.set_adjustment_backend(preset["backend"])
+    processor.operations.executor = StripExecutor(threads)
+    effect_chain = [(getattr(processor.effects, name), params) for name, params in preset["effects"]]
+    preset_adjustments = preset["adjustments"]
+
+
+def process_file(job):
+    source_path, output_path = job
+    try:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        processor.load_image(source_path)
+        processor.image = processor.original_image
+        processor.adjustments.update(preset_adjustments)
+        processor.export_image(output_path, tuple(Operation(func, params) for func, params in effect_chain))
+        return source_path, None
+    except Exception as e:
+        return source_path, str(e)
+
+
+def glob_root(pattern):
+    root = os.path.dirname(pattern)
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+    return root or os.curdir
+
+
+def iter_jobs(pattern, output_dir, extension=None):
+    root = glob_root(pattern)
+    outputs = {}
+    for source_path in glob.iglob(pattern, recursive=True):
+        if not os.path.isfile(source_path):
+            continue
+        name, ext = os.path.splitext(os.path.relpath(source_path, root))
+        output_path = os.path.join(output_dir, name + (f".{extension.lstrip('.')}" if extension else ext))
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in outputs:
+            raise ValueError(f"{outputs[key]} и {source_path} записываются в один файл {output_path}")
+        outputs[key] = source_path
+        yield source_path, output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ImageEditor batch processing")
+    parser.add_argument("preset", help="JSON preset: {\"adjustments\": {...}, \"effects\": [{\"name\": \"blur\", "
+                                       "\"params\": [2, \"gaussian\"]}]}")
+    parser.add_argument("input", help="input glob, e.g. \"photos/**/*.jpg\"")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--format", help="output extension, defaults to the input one")
+    args = parser.parse_args(argv)
+
+    try:
+        preset = load_preset(args.preset)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"Ошибка загрузки пресета: {e}")
+    try:
+        jobs = list(iter_jobs(args.input, args.output_dir, args.format))
+    except ValueError as e:
+        parser.error(f"Конфликт выходных файлов: {e}")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    done = failed = 0
+    start = time.perf_counter()
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    with Pool(args.workers, initializer=init_worker, initargs=(preset, threads)) as pool:
+        for source_path, error in pool.imap_unordered(process_file, jobs):
+            if error:
+                failed += 1
+                print(f"Ошибка обработки {source_path}: {error}")
+            else:
+                done += 1
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"Обработано: {done}, ошибок: {failed}, {elapsed:.1f} с, {rate:.2f} изобр./с")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
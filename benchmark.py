@@ -0,0 +1,690 @@
+import argparse
+import importlib.util
+import itertools
+import json
+import platform
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import cv2
+from PIL import Image, ImageFilter
+from effects import Effects
+from adjustment_engine import AdjustmentEngine, BACKENDS
+from color_lut import ColorLUT
+from blur_engine import BlurEngine
+from operation_graph import OperationGraph
+from image_processor import ImageProcessor
+from strip_executor import StripExecutor
+from image_buffer import ImageBuffer
+from scopes import Scopes
+from color_matcher import ColorMatcher
+
+ADJUSTMENTS = {
+    "brightness": 0.1, "contrast": 0.2, "saturation": 0.15, "exposure": 0.05,
+    "shadows": 0.2, "highlights": -0.1, "blacks": -0.05, "whites": 0.05,
+    "hue": 0.1, "temperature": 0.1, "white_balance": -0.05, "warmth": 0.1
+}
+TONAL_ADJUSTMENTS = {key: value for key, value in ADJUSTMENTS.items() if key not in ("saturation", "hue")}
+M_MMAP_THRESHOLD = -3
+BACKEND_CASES = [
+    ("all", ADJUSTMENTS), ("tonal", TONAL_ADJUSTMENTS), ("saturation", {"saturation": 0.3}),
+    ("hue", {"hue": 0.4}), ("contrast+shadows", {"contrast": -0.3, "shadows": 0.5}),
+    ("exposure+highlights", {"exposure": 0.8, "highlights": -0.5})
+]
+PARITY_MEAN = 0.1
+PARITY_OUTLIERS = 1e-4
+PARITY_SAMPLES = 300
+
+
+def synthetic_image(megapixels, seed=0):
+    width = int((megapixels * 1_000_000 * 3 / 2) ** 0.5)
+    height = int(width * 2 / 3)
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)
+    array = np.empty((height, width, 3), dtype=np.uint8)
+    array[..., 0] = gradient
+    array[..., 1] = gradient[::-1]
+    array[..., 2] = rng.integers(0, 256, (height, 1), dtype=np.uint8)
+    return Image.fromarray(array)
+
+
+def chained_adjustments(image, adjustments):
+    effects = Effects()
+    for key in AdjustmentEngine.ORDER:
+        if adjustments.get(key, 0) != 0:
+            image = getattr(effects, f"adjust_{key}")(image, adjustments[key])
+    return image
+
+
+def looped_oil_painting(image, radius, intensity):
+    img_array = np.array(image)
+    height, width = img_array.shape[:2]
+    result = img_array.copy()
+    for y in range(radius, height - radius):
+        for x in range(radius, width - radius):
+            region = img_array[y - radius:y + radius + 1, x - radius:x + radius + 1]
+            avg_color = np.mean(region, axis=(0, 1)).astype(np.uint8)
+            result[y, x] = (result[y, x] * (1 - intensity) + avg_color * intensity).astype(np.uint8)
+    return Image.fromarray(result)
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def memory_status():
+    try:
+        with open("/proc/self/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(status["VmRSS"].split()[0]) * 1024, int(status["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    import psutil
+    info = psutil.Process().memory_info()
+    if hasattr(info, "peak_wset"):
+        return info.rss, info.peak_wset
+    import resource
+    return info.rss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def measure(conn, job, args, repeat):
+    func = job(*args)
+    reset_peak()
+    base = memory_status()[0]
+    elapsed = timed(func, repeat)
+    conn.send((elapsed, memory_status()[1] - base))
+
+
+def peak_memory(job, args=(), repeat=1):
+    receiver, sender = multiprocessing.Pipe(False)
+    process = multiprocessing.get_context("spawn").Process(target=measure, args=(sender, job, args, repeat))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        process.join()
+        raise MemoryError(f"процесс замера завершился с кодом {process.exitcode}")
+    process.join()
+    return result
+
+
+def bench_adjustments(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    engine = AdjustmentEngine()
+    chain_time = timed(lambda: chained_adjustments(image, ADJUSTMENTS), repeat)
+    fused_time = timed(lambda: engine.apply(image, ADJUSTMENTS), repeat)
+    print(f"{megapixels:>5} MP  chain {chain_time * 1000:8.1f} ms  "
+          f"fused {fused_time * 1000:8.1f} ms  x{chain_time / fused_time:.1f}")
+
+
+def bench_lut(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    array = np.asarray(image)
+    engine = AdjustmentEngine()
+    lut = ColorLUT.build(engine, TONAL_ADJUSTMENTS, engine.channel_means(array))
+    build_time = timed(lambda: ColorLUT.build(engine, TONAL_ADJUSTMENTS, engine.channel_means(array)), repeat)
+    fused_time = timed(lambda: engine.apply_array(array, TONAL_ADJUSTMENTS), repeat)
+    lut_time = timed(lambda: lut.apply_array(array), repeat)
+    print(f"{megapixels:>5} MP  tonal fused {fused_time * 1000:8.1f} ms  "
+          f"lut {lut_time * 1000:8.1f} ms (build {build_time * 1000:.1f} ms)  x{fused_time / lut_time:.1f}")
+
+
+def bench_oil_painting(megapixels, repeat, loop_megapixels):
+    image = synthetic_image(megapixels)
+    times = [timed(lambda: Effects.apply_oil_painting(image, radius, 1.0, 20), repeat) for radius in (1, 5, 15)]
+    line = (f"{megapixels:>5} MP  oil painting r1 {times[0] * 1000:8.1f} ms  "
+            f"r5 {times[1] * 1000:8.1f} ms  r15 {times[2] * 1000:8.1f} ms")
+    if loop_megapixels:
+        sample = synthetic_image(loop_megapixels)
+        loop_time = timed(lambda: looped_oil_painting(sample, 5, 1.0), 1) * megapixels / loop_megapixels
+        line += f"  loop r5 ~{loop_time:8.1f} s  x{loop_time / times[1]:.0f}"
+    print(line)
+
+
+def bench_operation_graph(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    graph = OperationGraph()
+    graph.reset(image)
+    chain = ((Effects.apply_sepia, 0.5), (Effects.apply_vignette, 0.5), (Effects.apply_blur, 4, "gaussian"))
+    for func, *params in chain:
+        graph.commit(graph.appended(func, *params))
+    graph.render(graph.operations)
+    replay_time = timed(lambda: graph.render(tuple(op.fresh() for op in graph.operations)), repeat)
+    last_time = timed(lambda: graph.render(graph.updated(2, 6, "gaussian")), repeat)
+    first_time = timed(lambda: graph.render(graph.updated(0, 0.6)), repeat)
+    print(f"{megapixels:>5} MP  graph replay {replay_time * 1000:8.1f} ms  "
+          f"edit last {last_time * 1000:8.1f} ms  edit first {first_time * 1000:8.1f} ms")
+
+    rendered = []
+
+    def counted(func):
+        def run(image, *params):
+            rendered.append(func.__name__)
+            return func(image, *params)
+        run.__name__ = func.__name__
+        return run
+
+    processor = ImageProcessor()
+    processor.original_image = processor.image = image
+    processor.operations.reset(image)
+    for func, *params in chain:
+        operations = processor.operations.appended(counted(func), *params)
+        processor.commit_operations(operations, processor.operations.render(operations))
+    failures = 0
+    for label, operations, expected in [
+        ("update 2", processor.update_operation(1, 0.8), ["apply_vignette", "apply_blur"]),
+        ("remove 2", processor.remove_operation(1), ["apply_blur"]),
+        ("update 3", processor.update_operation(2, 6, "gaussian"), ["apply_blur"])
+    ]:
+        rendered.clear()
+        processor.operations.render(operations)
+        nodes = list(dict.fromkeys(rendered))
+        failures += nodes != expected
+        print(f"{megapixels:>5} MP  processor {label} re-rendered {', '.join(nodes)}"
+              f"{'' if nodes == expected else '  ожидалось ' + ', '.join(expected)}")
+    return failures
+
+
+def blur_error(radius, downsample=False):
+    sample = np.asarray(synthetic_image(1, seed=1))
+    exact = cv2.GaussianBlur(sample, (0, 0), radius, borderType=cv2.BORDER_REPLICATE)
+    result = BlurEngine.gaussian(sample, radius, downsample)
+    return np.abs(result.astype(np.int16) - exact).mean()
+
+
+def bench_blur(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    array = np.asarray(image)
+    for radius in (2, 5, 20, 100):
+        pil_time = timed(lambda: image.filter(ImageFilter.GaussianBlur(radius)), repeat)
+        engine_time = timed(lambda: BlurEngine.gaussian(array, radius), repeat)
+        down_time = timed(lambda: BlurEngine.gaussian(array, radius, downsample=True), repeat)
+        error, down_error = blur_error(radius), blur_error(radius, downsample=True)
+        status = "ok" if error <= BlurEngine.TOLERANCE and down_error <= BlurEngine.DOWNSAMPLE_TOLERANCE else "FAIL"
+        print(f"{megapixels:>5} MP  blur r{radius:<3} pil {pil_time * 1000:7.1f} ms  engine {engine_time * 1000:7.1f} ms  "
+              f"downsampled {down_time * 1000:7.1f} ms  mean error {error:.2f}/{down_error:.2f} {status}")
+
+
+def bench_intermediate_cache(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    session = [(Effects.apply_glow, 2, 0.3), (Effects.apply_glow, 2, 0.5), (Effects.apply_details, 0.5),
+               (Effects.apply_smoothing, 0.4), (Effects.apply_grayscale, 0.5), (Effects.apply_grayscale, 1.0)]
+
+    def run():
+        for func, *params in session:
+            func(image, *params)
+
+    Effects.cache.clear()
+    cold_time = timed(run, 1)
+    warm_time = timed(run, repeat)
+    stats = Effects.cache.stats()
+    print(f"{megapixels:>5} MP  effect session cold {cold_time * 1000:8.1f} ms  warm {warm_time * 1000:8.1f} ms  "
+          f"hit rate {stats['hit_rate']:.0%} ({stats['entries']} entries, {stats['bytes'] / 2 ** 20:.0f} MB)")
+
+
+def export_processor(image, scale=1.0):
+    processor = ImageProcessor()
+    processor.original_image = processor.image = image
+    processor.adjustments.update(TONAL_ADJUSTMENTS)
+    processor.adjustments["width"] = round(image.width * scale)
+    processor.adjustments["height"] = round(image.height * scale)
+    return processor
+
+
+def export_job(megapixels, path, streaming):
+    processor = export_processor(synthetic_image(megapixels))
+    if streaming:
+        return lambda: processor.export_image(path)
+    return lambda: processor.get_processed_image().save(path)
+
+
+def bench_export(megapixels, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        for ext in (".tiff", ".png"):
+            path = os.path.join(directory, "export" + ext)
+            full_time, full_peak = peak_memory(export_job, (megapixels, path, False))
+            stream_time, stream_peak = peak_memory(export_job, (megapixels, path, True))
+            print(f"{megapixels:>5} MP  export {ext:<5} full {full_time * 1000:8.1f} ms {full_peak / 2 ** 20:7.1f} MB  "
+                  f"streaming {stream_time * 1000:8.1f} ms {stream_peak / 2 ** 20:7.1f} MB")
+        path = os.path.join(directory, "parity.tiff")
+        image = np.asarray(synthetic_image(0.4))
+        image = image // 2 + np.random.default_rng(1).integers(0, 128, image.shape, dtype=np.uint8)
+        for scale in (1.0, 0.61, 1.3):
+            processor = export_processor(Image.fromarray(image), scale)
+            processor.export_image(path)
+            difference = np.abs(np.asarray(Image.open(path), dtype=np.int16) -
+                                np.asarray(processor.get_processed_image()))
+            print(f"{megapixels:>5} MP  export streaming vs full render, x{scale:<4}  "
+                  f"max diff {difference.max():3d}  differing pixels {np.mean(difference > 0):.4%}")
+
+
+def bench_open(megapixels, repeat):
+    processor = ImageProcessor()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "open.jpg")
+        synthetic_image(megapixels).save(path, quality=90)
+
+        def first_pixel(draft):
+            processor.load_image(path, draft)
+            width = processor.get_output_size()[0]
+            processor.get_preview_image(min(1.0, 1200 / width))
+
+        full_time = timed(lambda: first_pixel(False), repeat)
+        draft_time = timed(lambda: first_pixel(True), repeat)
+        decode_time = timed(lambda: processor.decode_image(path), repeat)
+        print(f"{megapixels:>5} MP  open jpeg first pixel full {full_time * 1000:8.1f} ms  "
+              f"draft {draft_time * 1000:7.1f} ms  background decode {decode_time * 1000:8.1f} ms")
+
+
+def bench_parallel(megapixels, repeat, max_workers):
+    image = synthetic_image(megapixels)
+    effects = [(Effects.apply_sepia, 0.8), (Effects.apply_invert, 0.5), (Effects.apply_emboss, 0.7),
+               (Effects.apply_noise_reduction, 0.8), (Effects.apply_oil_painting, 3, 1.0, 20),
+               (Effects.adjust_temperature, 0.2), (Effects.adjust_shadows, 0.3)]
+    counts = sorted({1, max_workers} | {2 ** i for i in range(max_workers.bit_length()) if 2 ** i < max_workers})
+    cv2_threads = cv2.getNumThreads()
+    cv2.setNumThreads(1)
+    try:
+        for func, *params in effects:
+            times = []
+            for workers in counts:
+                executor = StripExecutor(workers)
+                times.append(timed(lambda: executor.run(func, image, *params), repeat))
+                executor.shutdown()
+            scaling = "  ".join(f"{workers}x {times[0] / elapsed:4.1f}" for workers, elapsed in zip(counts, times))
+            print(f"{megapixels:>5} MP  strips {func.__name__:<22} 1 thread {times[0] * 1000:8.1f} ms  speedup {scaling}")
+    finally:
+        cv2.setNumThreads(cv2_threads)
+
+
+def meshgrid_vignette(image, intensity):
+    img_array = np.array(image)
+    height, width = img_array.shape[:2]
+    x, y = np.meshgrid(np.arange(width), np.arange(height))
+    distance = np.sqrt((x - width / 2) ** 2 + (y - height / 2) ** 2)
+    vignette = np.clip(1 - distance / np.sqrt((width / 2) ** 2 + (height / 2) ** 2) * intensity, 0, 1)
+    return Image.fromarray((img_array * vignette[:, :, np.newaxis]).astype(np.uint8))
+
+
+def traced(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_vignette(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    Effects.vignette_field(image.width, image.height)
+    reference, old_time, old_peak = traced(lambda: meshgrid_vignette(image, 0.5))
+    result, new_time, new_peak = traced(lambda: Effects.apply_vignette(image, 0.5))
+    new_time = min(new_time, timed(lambda: Effects.apply_vignette(image, 0.5), repeat))
+    error = np.abs(np.asarray(result, dtype=np.int16) - np.asarray(reference)).max()
+    print(f"{megapixels:>5} MP  vignette meshgrid {old_time * 1000:7.1f} ms {old_peak / 2 ** 20:7.1f} MB  "
+          f"cached field {new_time * 1000:7.1f} ms {new_peak / 2 ** 20:7.1f} MB  max error {error}")
+
+
+def float_blend(base, other, intensity):
+    return (base * (1 - intensity) + other * intensity).astype(np.uint8)
+
+
+def bench_blend(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    base = np.asarray(image)
+    other = cv2.bitwise_not(base)
+    _, float_time, float_peak = traced(lambda: float_blend(base, other, 0.3))
+    _, blend_time, blend_peak = traced(lambda: Effects.blend(base, other, 0.3, out=np.empty_like(base)))
+    float_time = min(float_time, timed(lambda: float_blend(base, other, 0.3), repeat))
+    blend_time = min(blend_time, timed(lambda: Effects.blend(base, other, 0.3), repeat))
+    print(f"{megapixels:>5} MP  blend float64 {float_time * 1000:7.1f} ms {float_peak / 2 ** 20:7.1f} MB  "
+          f"uint8 {blend_time * 1000:7.1f} ms {blend_peak / 2 ** 20:7.1f} MB")
+    for func, *params in [(Effects.apply_invert, 0.5), (Effects.apply_emboss, 0.7), (Effects.apply_sepia, 0.8),
+                          (Effects.apply_grayscale, 0.6), (Effects.apply_details, 0.5), (Effects.apply_sharpen, 0.9),
+                          (Effects.apply_noise_reduction, 0.8), (Effects.apply_smoothing, 0.7)]:
+        Effects.cache.clear()
+        _, elapsed, peak = traced(lambda: func(image, *params))
+        elapsed = min(elapsed, timed(lambda: func(image, *params), repeat))
+        print(f"{megapixels:>5} MP  blend {func.__name__:<22} {elapsed * 1000:7.1f} ms  peak {peak / 2 ** 20:7.1f} MB")
+
+
+def bench_stage_cache(megapixels, repeat):
+    processor = ImageProcessor()
+    processor.original_image = processor.image = synthetic_image(megapixels)
+    processor.adjustments.update(ADJUSTMENTS)
+    processor.adjustments["width"], processor.adjustments["height"] = processor.image.size
+    sweep = [round(0.05 * step, 2) for step in range(1, repeat + 4)]
+
+    def drag(cache_budget):
+        processor.stage_cache_bytes = cache_budget
+        processor.stage_cache.clear()
+        start = time.perf_counter()
+        for warmth in sweep:
+            processor.update_adjustment("warmth", warmth)
+            processor.get_processed_image()
+        return (time.perf_counter() - start) / len(sweep)
+
+    uncached = drag(0)
+    cached = drag(512 * 1024 * 1024)
+    print(f"{megapixels:>5} MP  warmth drag per frame uncached {uncached * 1000:8.1f} ms  "
+          f"stage cache {cached * 1000:8.1f} ms  hit rate {processor.stage_cache.hit_rate:.0%}")
+
+
+class CopyingBuffer(ImageBuffer):
+    def view(self, image):
+        return np.asarray(image)
+
+    def wrap(self, array, mode=None):
+        return Image.fromarray(array, mode) if mode else Image.fromarray(array)
+
+    def scratch(self, name, shape, dtype=np.float32):
+        return np.empty(shape, dtype=dtype)
+
+
+def legacy_render(processor):
+    base = np.asarray(processor.apply_geometry(processor.image.copy()))
+    engine = AdjustmentEngine(processor.engine.order)
+    means = engine.channel_means(base) if engine.needs_means(processor.adjustments) else None
+    lut = ColorLUT.build(engine, processor.adjustments, means)
+    if not lut.program:
+        return Image.fromarray(base)
+    if lut.separable:
+        return Image.fromarray(lut.apply_array(base))
+    return Image.fromarray(engine.apply_array(base, processor.adjustments, means))
+
+
+def fresh_frames(func, frame_bytes, repeat):
+    import resource
+    func()
+    best = float("inf")
+    for _ in range(repeat):
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+        func()
+        best = min(best, resource.getrusage(resource.RUSAGE_SELF).ru_minflt - before)
+    return best * resource.getpagesize() / frame_bytes
+
+
+def bench_allocations(megapixels, repeat):
+    if importlib.util.find_spec("resource") is None:
+        print(f"{megapixels:>5} MP  render frames allocated пропущено: нет модуля resource на {platform.system()}")
+        return
+    import ctypes
+    multiarray = getattr(np, "_core", getattr(np, "core", None)).multiarray
+    hugepages = multiarray._set_madvise_hugepage(False)
+    try:
+        ctypes.CDLL(None).mallopt(M_MMAP_THRESHOLD, 128 * 1024)
+    except (OSError, AttributeError, TypeError):
+        pass
+    image = synthetic_image(megapixels)
+    frame_bytes = image.width * image.height * 3
+    processor = ImageProcessor()
+    processor.original_image = processor.image = image
+    processor.adjustments["width"], processor.adjustments["height"] = image.size
+
+    warmth = itertools.cycle([0.1, 0.12, 0.14, 0.16])
+
+    def drag(render):
+        if processor.engine.active(processor.adjustments):
+            processor.update_adjustment("warmth", next(warmth))
+        return render()
+
+    def chain():
+        result = image
+        for func, *params in [(Effects.apply_invert, 0.5), (Effects.apply_sepia, 0.8), (Effects.apply_vignette, 0.5),
+                              (Effects.apply_details, 0.5), (Effects.adjust_exposure, 0.1)]:
+            result = func(result, *params)
+        return result
+
+    buffer = Effects.buffer
+    try:
+        for label, adjustments in [("no adjustments", {}), ("separable", {"exposure": 0.1, "warmth": 0.1}),
+                                   ("staged", ADJUSTMENTS)]:
+            processor.adjustments.update({key: 0 for key in AdjustmentEngine.ORDER})
+            processor.adjustments.update(adjustments)
+            before = fresh_frames(lambda: drag(lambda: legacy_render(processor)), frame_bytes, repeat)
+            after = fresh_frames(lambda: drag(processor.get_processed_image), frame_bytes, repeat)
+            print(f"{megapixels:>5} MP  render {label:<15} frames allocated copying {before:5.2f}  "
+                  f"copy-on-write {after:5.2f}")
+        Effects.buffer = CopyingBuffer()
+        before = fresh_frames(chain, frame_bytes, repeat)
+        Effects.buffer = buffer
+        after = fresh_frames(chain, frame_bytes, repeat)
+        print(f"{megapixels:>5} MP  effect chain x5          frames allocated copying {before:5.2f}  "
+              f"copy-on-write {after:5.2f}")
+    finally:
+        Effects.buffer = buffer
+        multiarray._set_madvise_hugepage(hugepages)
+
+
+def backend_parity(array, adjustments):
+    reference = AdjustmentEngine().apply_array(array, adjustments).astype(np.int16)
+    result = {}
+    for name, engine in BACKENDS.items():
+        difference = np.abs(engine().apply_array(array, adjustments) - reference)
+        result[name] = (int(difference.max()), float(difference.mean()), float(np.mean(difference > 1)))
+    return result
+
+
+def bench_backends(megapixels, repeat):
+    image = np.asarray(synthetic_image(megapixels))
+    noise = np.random.default_rng(1).integers(0, 256, image.shape, dtype=np.uint8)
+    failures = 0
+    for label, adjustments in BACKEND_CASES:
+        times = []
+        for name, engine in BACKENDS.items():
+            engine = engine(buffer=Effects.buffer)
+            full = timed(lambda: engine.apply_array(image, adjustments), repeat)
+            tile = timed(lambda: engine.apply_array(image[:256, :256], adjustments), repeat * 10)
+            times.append(f"{name} {full * 1000:7.1f} ms tile {tile * 1000:6.2f} ms")
+        parity = [value for array in (image, noise) for value in backend_parity(array, adjustments).values()]
+        worst = max(value[0] for value in parity)
+        mean = max(value[1] for value in parity)
+        outliers = max(value[2] for value in parity)
+        ok = mean <= PARITY_MEAN and outliers <= PARITY_OUTLIERS
+        failures += not ok
+        print(f"{megapixels:>5} MP  backend {label:<20} {'  '.join(times)}  "
+              f"max diff {worst:3d} mean {mean:.4f} >1: {outliers:.5%}{'' if ok else '  Паритет нарушен'}")
+    return failures
+
+
+def random_adjustments(rng):
+    keys = rng.choice(AdjustmentEngine.ORDER, rng.integers(1, 6), replace=False)
+    return {str(key): round(float(rng.uniform(-1, 1)), 2) for key in keys}
+
+
+def bench_parity(samples, seed=0):
+    rng = np.random.default_rng(seed)
+    image = np.asarray(synthetic_image(0.25, seed=seed))
+    noise = rng.integers(0, 256, image.shape, dtype=np.uint8)
+    failures, worst, means, outliers = [], 0, [], []
+    for _ in range(samples):
+        adjustments = random_adjustments(rng)
+        parity = [value for array in (image, noise) for value in backend_parity(array, adjustments).values()]
+        worst = max(worst, max(value[0] for value in parity))
+        means.append(max(value[1] for value in parity))
+        outliers.append(max(value[2] for value in parity))
+        if means[-1] > PARITY_MEAN or outliers[-1] > PARITY_OUTLIERS:
+            failures.append(adjustments)
+    print(f"backend parity {samples} random settings  max diff {worst:3d} mean {np.mean(means):.4f} "
+          f"worst mean {max(means):.4f} >1: {np.mean(outliers):.5%} worst {max(outliers):.5%}  "
+          f"нарушений {len(failures)}")
+    for adjustments in failures:
+        print(f"Паритет нарушен: {adjustments}")
+    return len(failures)
+
+
+def hsv_hue(image, factor):
+    img_array = np.array(image.convert("HSV")).astype(np.float32)
+    img_array[:, :, 0] = (img_array[:, :, 0] + factor * 180) % 360
+    return Image.fromarray(img_array.astype(np.uint8), mode="HSV").convert("RGB")
+
+
+def bench_hue(megapixels, repeat):
+    image = synthetic_image(megapixels)
+    old = timed(lambda: hsv_hue(image, 0.3), repeat)
+    new = timed(lambda: Effects.adjust_hue(image, 0.3), repeat)
+    chain = AdjustmentEngine().apply_array(np.asarray(image), {"hue": 0.3}).astype(np.int16)
+    chain_error = np.abs(np.asarray(Effects.adjust_hue(image, 0.3)) - chain).max()
+    wrap_error = np.abs(np.asarray(Effects.adjust_hue(image, 1.0), dtype=np.int16) -
+                        np.asarray(Effects.adjust_hue(image, -1.0))).max()
+    print(f"{megapixels:>5} MP  hue PIL HSV {old * 1000:7.1f} ms  YIQ rotation {new * 1000:7.1f} ms  "
+          f"vs adjustment chain max diff {chain_error}  +180/-180 max diff {wrap_error}")
+
+
+def bench_scopes(megapixels, repeat):
+    processor = ImageProcessor()
+    processor.original_image = processor.image = synthetic_image(megapixels)
+    processor.adjustments.update(ADJUSTMENTS)
+    processor.adjustments["width"], processor.adjustments["height"] = processor.image.size
+    preview, _ = processor.get_preview_image(min(1.0, processor.SCOPE_WIDTH / processor.image.width))
+    array = np.asarray(preview)
+    scopes = timed(lambda: Scopes.compute(array), repeat * 10)
+    frame = timed(processor.get_scopes, repeat)
+    levels = timed(processor.auto_levels, repeat)
+    reference = synthetic_image(1, seed=1)
+    transfer = timed(lambda: ColorMatcher.transfer(processor.image, reference), repeat)
+    print(f"{megapixels:>5} MP  scopes {array.shape[1]}x{array.shape[0]} {scopes * 1000:5.2f} ms  "
+          f"with cached preview {frame * 1000:5.2f} ms  auto levels {levels * 1000:5.2f} ms  "
+          f"color transfer {transfer * 1000:7.1f} ms")
+
+
+def suite_cases(image):
+    reference = synthetic_image(1, seed=1)
+    for name, spec in Effects.REGISTRY.items():
+        params = spec.bind([0.2]) if name.startswith("adjust_") else spec.bind()
+        yield name, lambda func=getattr(Effects, name), params=params: func(image, *params)
+    yield "match_colors", lambda: Effects.match_colors(image, reference)
+
+    processor = ImageProcessor()
+    processor.original_image = processor.image = image
+    processor.adjustments.update(ADJUSTMENTS)
+    processor.adjustments["width"], processor.adjustments["height"] = image.size
+    yield "get_processed_image", processor.get_processed_image
+
+    for name in BACKENDS:
+        if name != AdjustmentEngine.NAME:
+            backend = ImageProcessor()
+            backend.original_image = backend.image = image
+            backend.adjustments.update(processor.adjustments)
+            backend.set_adjustment_backend(name)
+            yield f"get_processed_image_{name}", backend.get_processed_image
+
+
+def suite_job(megapixels, name):
+    return dict(suite_cases(synthetic_image(megapixels)))[name]
+
+
+def run_suite(sizes, repeat, only=None):
+    results = {}
+    names = [name for name, _ in suite_cases(synthetic_image(0.01))]
+    for megapixels in sizes:
+        for name in names:
+            if only and not any(pattern in name for pattern in only):
+                continue
+            key = f"{megapixels:g}MP/{name}"
+            try:
+                elapsed, peak = peak_memory(suite_job, (megapixels, name), repeat)
+                results[key] = {"time_ms": elapsed * 1000, "peak_mb": peak / 2 ** 20}
+            except MemoryError as e:
+                results[key] = {"error": str(e)}
+            print(f"{key:<34} " + (f"{results[key]['time_ms']:9.1f} ms {results[key]['peak_mb']:8.1f} MB"
+                                   if "error" not in results[key] else results[key]["error"]), flush=True)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta=2.0):
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or "error" in base or "error" in result:
+            continue
+        for metric in ("time_ms", "peak_mb"):
+            if result[metric] > base[metric] * (1 + threshold) and result[metric] - base[metric] > min_delta:
+                regressions.append(f"{key} {metric}: {base[metric]:.1f} -> {result[metric]:.1f} "
+                                   f"(+{result[metric] / base[metric] - 1:.0%})")
+    return regressions
+
+
+def suite_main(args):
+    results = run_suite(args.sizes or [1, 12, 24, 100], args.repeat, args.only)
+    report = {
+        "meta": {
+            "python": platform.python_version(), "numpy": np.__version__, "opencv": cv2.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count(), "repeat": args.repeat
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    for regression in regressions:
+        print(f"Регрессия: {regression}")
+    print(f"Сравнение с {args.baseline}: {len(regressions)} регрессий при пороге {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ImageEditor benchmarks")
+    parser.add_argument("--sizes", type=float, nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--loop-sample", type=float, default=0.05,
+                        help="megapixels timed with the per-pixel oil painting loop and scaled up, 0 to skip")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="largest strip thread count to time")
+    parser.add_argument("--suite", action="store_true",
+                        help="time every Effects method and get_processed_image, defaults to 1 12 24 100 MP")
+    parser.add_argument("--only", nargs="+", help="suite cases whose name contains any of these")
+    parser.add_argument("--output", help="write suite results as JSON")
+    parser.add_argument("--baseline", help="suite JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown/growth before a regression")
+    parser.add_argument("--min-delta", type=float, default=2.0,
+                        help="ignore differences below this many ms/MB as timer and allocator noise")
+    args = parser.parse_args()
+    if args.suite:
+        return suite_main(args)
+    failures = bench_parity(PARITY_SAMPLES)
+    for megapixels in args.sizes or [1, 12, 24]:
+        bench_adjustments(megapixels, args.repeat)
+        bench_lut(megapixels, args.repeat)
+        bench_oil_painting(megapixels, args.repeat, args.loop_sample)
+        failures += bench_operation_graph(megapixels, args.repeat)
+        bench_blur(megapixels, args.repeat)
+        bench_intermediate_cache(megapixels, args.repeat)
+        bench_export(megapixels, args.repeat)
+        bench_open(megapixels, args.repeat)
+        bench_parallel(megapixels, args.repeat, args.workers)
+        bench_vignette(megapixels, args.repeat)
+        bench_blend(megapixels, args.repeat)
+        bench_stage_cache(megapixels, args.repeat)
+        bench_allocations(megapixels, args.repeat)
+        failures += bench_backends(megapixels, args.repeat)
+        bench_hue(megapixels, args.repeat)
+        bench_scopes(megapixels, args.repeat)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+import math
+import numpy as np
+import cv2
+from PIL import Image
+
+
+class BlurEngine:
+    EXACT_SIGMA = 2.0
+    DOWNSAMPLE_SIGMA = 32.0
+    DOWNSAMPLE_TARGET = 16.0
+    PASSES = 3
+    TOLERANCE = 1.5
+    DOWNSAMPLE_TOLERANCE = 3.0
+
+    @staticmethod
+    def box_sizes(sigma, passes=3):
+        ideal = math.sqrt(12 * sigma * sigma / passes + 1)
+        lower = int(ideal)
+        if lower % 2 == 0:
+            lower -= 1
+        upper = lower + 2
+        count = round((12 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes)
+                      / (-4 * lower - 4))
+        return [lower if i < count else upper for i in range(passes)]
+
+    @staticmethod
+    def box(array, radius):
+        size = 2 * int(round(radius)) + 1
+        if size == 1:
+            return array.copy()
+        return cv2.blur(array, (size, size), borderType=cv2.BORDER_REPLICATE)
+
+    @classmethod
+    def halo(cls, radius, blur_type="gaussian"):
+        if blur_type == "box":
+            return int(round(radius))
+        if radius <= 0:
+            return 0
+        if radius <= cls.EXACT_SIGMA:
+            return (int(round(radius * 6 + 1)) | 1) // 2
+        return sum((size - 1) // 2 for size in cls.box_sizes(radius, cls.PASSES))
+
+    @classmethod
+    def gaussian(cls, array, sigma, downsample=False):
+        if sigma <= 0:
+            return array.copy()
+        if sigma <= cls.EXACT_SIGMA:
+            return cv2.GaussianBlur(array, (0, 0), sigma, borderType=cv2.BORDER_REPLICATE)
+        if downsample and sigma > cls.DOWNSAMPLE_SIGMA:
+            return cls._downsampled(array, sigma)
+        for size in cls.box_sizes(sigma, cls.PASSES):
+            array = cv2.blur(array, (size, size), borderType=cv2.BORDER_REPLICATE)
+        return array
+
+    @classmethod
+    def _downsampled(cls, array, sigma):
+        factor = 2 ** int(math.log2(sigma / cls.DOWNSAMPLE_TARGET))
+        height, width = array.shape[:2]
+        pad_y, pad_x = -height % factor, -width % factor
+        if pad_y or pad_x:
+            array = cv2.copyMakeBorder(array, 0, pad_y, 0, pad_x, cv2.BORDER_REPLICATE)
+        padded = (width + pad_x, height + pad_y)
+        small = cv2.resize(array, (padded[0] // factor, padded[1] // factor), interpolation=cv2.INTER_AREA)
+        small = cls.gaussian(small, sigma / factor)
+        return cv2.resize(small, padded, interpolation=cv2.INTER_LINEAR)[:height, :width]
+
+    @classmethod
+    def blur_array(cls, array, radius, blur_type="gaussian", downsample=False):
+        if blur_type == "box":
+            return cls.box(array, radius)
+        return cls.gaussian(array, radius, downsample)
+
+    @classmethod
+    def blur(cls, image, radius, blur_type="gaussian", downsample=False):
+        return Image.fromarray(cls.blur_array(np.asarray(image), radius, blur_type, downsample))
@@ -0,0 +1,79 @@
+import numpy as np
+import cv2
+from PIL import Image
+
+
+class ColorLUT:
+    def __init__(self, engine, program, size=33):
+        self.engine = engine
+        self.program = program
+        self.size = size
+        self.separable = all(op[0] != "contrast" and (op[0] != "affine" or self._is_diagonal(op[1]))
+                             for op in program)
+        self.bakeable = all(op[0] != "contrast" for op in program)
+        self.tables = self._build_tables() if self.separable else None
+        self._lattice = None
+
+    @staticmethod
+    def _is_diagonal(matrix):
+        return np.count_nonzero(matrix - np.diag(np.diagonal(matrix))) == 0
+
+    @classmethod
+    def build(cls, engine, adjustments, channel_means=None, size=33):
+        return cls(engine, engine.compile(adjustments, channel_means), size)
+
+    def _evaluate(self, samples):
+        result = self.engine.run(samples.astype(np.float32), self.program)
+        return np.clip(result, 0, 255)
+
+    def _build_tables(self):
+        ramp = np.repeat(np.arange(256, dtype=np.float32)[:, np.newaxis, np.newaxis], 3, axis=2)
+        return self._evaluate(ramp).astype(np.uint8).reshape(256, 1, 3)
+
+    @property
+    def lattice(self):
+        if self._lattice is None:
+            axis = np.linspace(0, 255, self.size, dtype=np.float32)
+            blue, green, red = np.meshgrid(axis, axis, axis, indexing="ij")
+            grid = np.stack([red, green, blue], axis=-1).reshape(-1, 1, 3)
+            self._lattice = self._evaluate(grid).reshape(-1, 3)
+        return self._lattice
+
+    def _apply_lattice(self, array):
+        size = self.size
+        position = np.arange(256, dtype=np.float32) * (size - 1) / 255
+        lower = np.minimum(position.astype(np.int32), size - 2)
+        fraction = position - lower
+        red, green, blue = array[..., 0], array[..., 1], array[..., 2]
+        base = (lower[blue] * size + lower[green]) * size + lower[red]
+        weights = (fraction[red][..., np.newaxis],
+                   fraction[green][..., np.newaxis],
+                   fraction[blue][..., np.newaxis])
+        result = np.zeros(array.shape, dtype=np.float32)
+        for db in (0, 1):
+            weight_b = weights[2] if db else 1 - weights[2]
+            for dg in (0, 1):
+                weight_bg = weight_b * (weights[1] if dg else 1 - weights[1])
+                for dr in (0, 1):
+                    weight = weight_bg * (weights[0] if dr else 1 - weights[0])
+                    result += self.lattice[base + (db * size + dg) * size + dr] * weight
+        return result.astype(np.uint8)
+
+    def apply_array(self, array):
+        if self.tables is not None:
+            return cv2.LUT(np.ascontiguousarray(array), self.tables)
+        return self._apply_lattice(array)
+
+    def apply(self, image):
+        return Image.fromarray(self.apply_array(np.asarray(image)))
+
+    def write_cube(self, path, title="ImageEditor"):
+        if not self.bakeable:
+            raise ValueError("contrast after shadows/highlights depends on the image and cannot be baked")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'TITLE "{title}"\n')
+            f.write(f"LUT_3D_SIZE {self.size}\n")
+            f.write("DOMAIN_MIN 0.0 0.0 0.0\n")
+            f.write("DOMAIN_MAX 1.0 1.0 1.0\n")
+            for red, green, blue in self.lattice / 255:
+                f.write(f"{red:.6f} {green:.6f} {blue:.6f}\n")
@@ -1,6 +1,7 @@
 from PIL import Image
 import numpy as np
-from tkinter import filedialog, messagebox
+import cv2
+from scopes import Scopes
 
 class ColorMatcher:
     def __init__(self):
@@ -8,6 +9,7 @@ class ColorMatcher:
         self.reference_image = None
 
     def match_colors(self, source_image):
+        from tkinter import filedialog, messagebox
         self.source_image = source_image.convert("RGB")
         reference_path = filedialog.askopenfilename(
             title="Выберите референтное изображение",
@@ -18,24 +20,22 @@ class ColorMatcher:
 
         try:
             self.reference_image = Image.open(reference_path).convert("RGB")
-            src_array = np.array(self.source_image).astype(float)
-            ref_array = np.array(self.reference_image).astype(float)
-            src_array = src_array / 255.0
-            ref_array = ref_array / 255.0
-            src_mean = np.mean(src_array, axis=(0, 1))
-            src_std = np.std(src_array, axis=(0, 1))
-            ref_mean = np.mean(ref_array, axis=(0, 1))
-            ref_std = np.std(ref_array, axis=(0, 1))
-            adjusted = np.zeros_like(src_array)
-            for channel in range(3):
-                if src_std[channel] != 0:
-                    adjusted[:, :, channel] = (src_array[:, :, channel] - src_mean[channel]) * (ref_std[channel] / src_std[channel]) + ref_mean[channel]
-                else:
-                    adjusted[:, :, channel] = src_array[:, :, channel]
-            adjusted = np.clip(adjusted * 255, 0, 255).astype(np.uint8)
-            result = Image.fromarray(adjusted)
+            result = self.transfer(self.source_image, self.reference_image)
             messagebox.showinfo("Успех", "Цветокоррекция по образцу выполнена!")
             return result
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось выполнить цветокоррекцию: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def transfer(source_image, reference_image):
+        src_array = np.asarray(source_image.convert("RGB"))
+        src_mean, src_std = Scopes.statistics(Scopes.channel_histogram(src_array))
+        ref_mean, ref_std = Scopes.statistics(Scopes.channel_histogram(np.asarray(reference_image)))
+        src_mean, src_std, ref_mean, ref_std = src_mean / 255.0, src_std / 255.0, ref_mean / 255.0, ref_std / 255.0
+        table = np.repeat(np.arange(256, dtype=float)[:, np.newaxis] / 255.0, 3, axis=1)
+        for channel in range(3):
+            if src_std[channel] != 0:
+                table[:, channel] = (table[:, channel] - src_mean[channel]) * (ref_std[channel] / src_std[channel]) + ref_mean[channel]
+        table = np.clip(table * 255, 0, 255).astype(np.uint8)
+        return Image.fromarray(cv2.LUT(src_array, table.reshape(256, 1, 3)))
\ No newline at end of file
@@ -50,6 +50,19 @@ class ControlPanel:
         )
         self.reset_button.pack(pady=5)
 
+        self.auto_levels_button = ctk.CTkButton(
+            self.parent,
+            text="",
+            command=self.auto_levels,
+            font=("Arial", 12),
+            width=150,
+            height=30,
+            fg_color=self.button_fg_color,
+            text_color=self.button_text_color,
+            hover_color="#5a9bd4" if self.ui.config["theme"] == "dark" else "#2a7bbf"
+        )
+        self.auto_levels_button.pack(pady=5)
+
         self.update_texts()
 
     def create_basic_controls(self, parent):
@@ -78,6 +91,7 @@ class ControlPanel:
         )
         self.brightness_slider.set(0)
         self.brightness_slider.pack(pady=2)
+        self.brightness_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.contrast_label = ctk.CTkLabel(
             scrollable_frame,
@@ -98,6 +112,7 @@ class ControlPanel:
         )
         self.contrast_slider.set(0)
         self.contrast_slider.pack(pady=2)
+        self.contrast_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.saturation_label = ctk.CTkLabel(
             scrollable_frame,
@@ -118,6 +133,7 @@ class ControlPanel:
         )
         self.saturation_slider.set(0)
         self.saturation_slider.pack(pady=2)
+        self.saturation_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
     def create_color_controls(self, parent):
         scrollable_frame = ctk.CTkScrollableFrame(
@@ -145,6 +161,7 @@ class ControlPanel:
         )
         self.white_balance_slider.set(0)
         self.white_balance_slider.pack(pady=2)
+        self.white_balance_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.hue_label = ctk.CTkLabel(
             scrollable_frame,
@@ -165,6 +182,7 @@ class ControlPanel:
         )
         self.hue_slider.set(0)
         self.hue_slider.pack(pady=2)
+        self.hue_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.temperature_label = ctk.CTkLabel(
             scrollable_frame,
@@ -185,6 +203,7 @@ class ControlPanel:
         )
         self.temperature_slider.set(0)
         self.temperature_slider.pack(pady=2)
+        self.temperature_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.exposure_label = ctk.CTkLabel(
             scrollable_frame,
@@ -205,6 +224,7 @@ class ControlPanel:
         )
         self.exposure_slider.set(0)
         self.exposure_slider.pack(pady=2)
+        self.exposure_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.shadows_label = ctk.CTkLabel(
             scrollable_frame,
@@ -225,6 +245,7 @@ class ControlPanel:
         )
         self.shadows_slider.set(0)
         self.shadows_slider.pack(pady=2)
+        self.shadows_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.highlights_label = ctk.CTkLabel(
             scrollable_frame,
@@ -245,6 +266,7 @@ class ControlPanel:
         )
         self.highlights_slider.set(0)
         self.highlights_slider.pack(pady=2)
+        self.highlights_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.blacks_label = ctk.CTkLabel(
             scrollable_frame,
@@ -265,6 +287,7 @@ class ControlPanel:
         )
         self.blacks_slider.set(0)
         self.blacks_slider.pack(pady=2)
+        self.blacks_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.whites_label = ctk.CTkLabel(
             scrollable_frame,
@@ -285,6 +308,7 @@ class ControlPanel:
         )
         self.whites_slider.set(0)
         self.whites_slider.pack(pady=2)
+        self.whites_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
         self.warmth_label = ctk.CTkLabel(
             scrollable_frame,
@@ -305,6 +329,7 @@ class ControlPanel:
         )
         self.warmth_slider.set(0)
         self.warmth_slider.pack(pady=2)
+        self.warmth_slider.bind("<ButtonRelease-1>", self.finish_adjustment)
 
     def create_advanced_controls(self, parent):
         scrollable_frame = ctk.CTkScrollableFrame(
@@ -459,6 +484,10 @@ class ControlPanel:
         self.apply_noise_reduction_button.configure(text=self.ui._("apply_noise_reduction"))
         self.apply_smoothing_button.configure(text=self.ui._("apply_smoothing"))
         self.reset_button.configure(text=self.ui._("reset_all"))
+        self.auto_levels_button.configure(text=self.ui._("auto_levels"))
+
+    def finish_adjustment(self, event=None):
+        self.update_callback(fast_mode=False)
 
     def update_brightness(self, value):
         self.processor.update_adjustment("brightness", value)
@@ -508,89 +537,47 @@ class ControlPanel:
         self.processor.update_adjustment("warmth", value)
         self.update_callback(fast_mode=True)
 
-    def apply_details(self, intensity):
+    def run_effect(self, effect, func, intensity):
+        def failed(error):
+            self.show_effect_error(effect, error)
+
         try:
-            self.parent.winfo_toplevel().event_generate("<<ShowLoading>>")
-            if not self.processor.image and not self.processor.original_image:
-                raise ValueError(self.ui._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_details(
-                self.processor.image if self.processor.image else self.processor.original_image,
-                intensity
-            )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
+            self.ui.run_effect(func, intensity, on_error=failed)
         except Exception as e:
-            CTkMessagebox(
-                title=self.ui._("error"),
-                message=self.ui._("effect_error", effect=self.ui._("details"), error=str(e)),
-                icon="cancel"
-            )
-        finally:
-            self.ui.hide_loading()
+            self.show_effect_error(effect, e)
+
+    def show_effect_error(self, effect, error):
+        CTkMessagebox(
+            title=self.ui._("error"),
+            message=self.ui._("effect_error", effect=self.ui._(effect), error=str(error)),
+            icon="cancel"
+        )
+
+    def apply_details(self, intensity):
+        self.run_effect("details", self.processor.effects.apply_details, intensity)
 
     def apply_sharpen(self, intensity):
-        try:
-            self.parent.winfo_toplevel().event_generate("<<ShowLoading>>")
-            if not self.processor.image and not self.processor.original_image:
-                raise ValueError(self.ui._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_sharpen(
-                self.processor.image if self.processor.image else self.processor.original_image,
-                intensity
-            )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-        except Exception as e:
-            CTkMessagebox(
-                title=self.ui._("error"),
-                message=self.ui._("effect_error", effect=self.ui._("sharpen"), error=str(e)),
-                icon="cancel"
-            )
-        finally:
-            self.ui.hide_loading()
+        self.run_effect("sharpen", self.processor.effects.apply_sharpen, intensity)
 
     def apply_noise_reduction(self, intensity):
-        try:
-            self.parent.winfo_toplevel().event_generate("<<ShowLoading>>")
-            if not self.processor.image and not self.processor.original_image:
-                raise ValueError(self.ui._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_noise_reduction(
-                self.processor.image if self.processor.image else self.processor.original_image,
-                intensity
-            )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-        except Exception as e:
-            CTkMessagebox(
-                title=self.ui._("error"),
-                message=self.ui._("effect_error", effect=self.ui._("noise_reduction"), error=str(e)),
-                icon="cancel"
-            )
-        finally:
-            self.ui.hide_loading()
+        self.run_effect("noise_reduction", self.processor.effects.apply_noise_reduction, intensity)
 
     def apply_smoothing(self, intensity):
-        try:
-            self.parent.winfo_toplevel().event_generate("<<ShowLoading>>")
-            if not self.processor.image and not self.processor.original_image:
-                raise ValueError(self.ui._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_smoothing(
-                self.processor.image if self.processor.image else self.processor.original_image,
-                intensity
-            )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
+        self.run_effect("smoothing", self.processor.effects.apply_smoothing, intensity)
+
+    def auto_levels(self):
+        if not self.processor.image:
+            return
+        snapshot = self.processor.snapshot()
+
+        def done(levels):
+            self.processor.merge_snapshot(snapshot)
+            for key, value in levels.items():
+                getattr(self, f"{key}_slider").set(value)
+                self.processor.update_adjustment(key, value)
             self.update_callback(fast_mode=False)
-        except Exception as e:
-            CTkMessagebox(
-                title=self.ui._("error"),
-                message=self.ui._("effect_error", effect=self.ui._("smoothing"), error=str(e)),
-                icon="cancel"
-            )
-        finally:
-            self.ui.hide_loading()
+
+        self.ui.scheduler.submit("levels", lambda cancelled: snapshot.auto_levels(), done, self.ui.show_render_error)
 
     def reset_all(self):
         self.brightness_slider.set(0)
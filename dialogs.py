@@ -2,6 +2,7 @@ import tkinter as tk
 import customtkinter as ctk
 from CTkMessagebox import CTkMessagebox
 from translator import Translator
+from effects import Effects
 
 class BaseDialog:
     def __init__(self, parent, processor, update_callback, ui):
@@ -31,6 +32,21 @@ class BaseDialog:
     def apply(self):
         raise NotImplementedError("Subclasses should implement this method")
 
+    def run_effect(self, effect, func, *args):
+        self.ui.run_effect(func, *args, on_success=self.dialog.destroy,
+                           on_error=lambda error: self.effect_failed(effect, error))
+
+    def update_effect(self, effect, index, *args):
+        self.ui.update_effect(index, *args, on_success=self.dialog.destroy,
+                              on_error=lambda error: self.effect_failed(effect, error))
+
+    def effect_failed(self, effect, error):
+        CTkMessagebox(
+            title=self._("error"),
+            message=self._("effect_error", effect=effect, error=str(error)),
+            icon="icon.ico"
+        )
+
     def _(self, text_id, **kwargs):
         return self.translator.get_text(text_id, self.lang, **kwargs)
 
@@ -157,8 +173,7 @@ class ResizeDialog(BaseDialog):
 
         self.width = self.processor.adjustments.get("width", self.processor.original_image.width)
         self.height = self.processor.adjustments.get("height", self.processor.original_image.height)
-        self.orig_width = self.processor.original_image.width
-        self.orig_height = self.processor.original_image.height
+        self.orig_width, self.orig_height = self.processor.source_size
 
         def update_fields():
             if self.unit_var.get() == self._("unit_percent"):
@@ -272,8 +287,7 @@ class ResizeDialog(BaseDialog):
             self.ui.target_zoom = min_zoom
             self.ui.offset_x = 0
             self.ui.offset_y = 0
-            full_img = self.processor.get_processed_image()
-            self.ui.full_img_width, self.ui.full_img_height = full_img.size
+            self.ui.full_img_width, self.ui.full_img_height = self.processor.get_output_size()
             self.update_callback()
             self.dialog.destroy()
         except ValueError as e:
@@ -344,7 +358,6 @@ class NoiseDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             noise_level = self.intensity_slider.get()
             type_map = {
                 self._("noise_type_gaussian"): "gaussian",
@@ -352,23 +365,18 @@ class NoiseDialog(BaseDialog):
             }
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_noise(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("noise_title").lower(),
+                self.processor.effects.apply_noise,
                 noise_level,
                 type_map[self.noise_type.get()]
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("noise_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class PixelationDialog(BaseDialog):
     def create_dialog(self):
@@ -413,20 +421,16 @@ class PixelationDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             block_size = int(self.block_size_entry.get())
             if block_size < 1 or block_size > 50:
                 raise ValueError(self._("invalid_block_size"))
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_pixelation(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("pixelation_title").lower(),
+                self.processor.effects.apply_pixelation,
                 block_size
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except ValueError as e:
             CTkMessagebox(
                 title=self._("error"),
@@ -439,14 +443,12 @@ class PixelationDialog(BaseDialog):
                 message=self._("effect_error", effect=self._("pixelation_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class VignetteDialog(BaseDialog):
     def create_dialog(self):
         super().create_dialog()
         self.dialog.title(self._("vignette_title"))
-        self.dialog.geometry("400x200")
+        self.dialog.geometry("400x420")
 
     def setup_widgets(self):
         ctk.CTkLabel(
@@ -472,6 +474,38 @@ class VignetteDialog(BaseDialog):
         self.intensity_slider.set(0.5)
         self.intensity_slider.pack(pady=5)
 
+        ctk.CTkLabel(
+            self.dialog,
+            text=self._("vignette_feather"),
+            font=("Arial", 14),
+            text_color=self.fg_color
+        ).pack(pady=5)
+        self.feather_slider = ctk.CTkSlider(
+            self.dialog,
+            from_=0.05,
+            to=1,
+            number_of_steps=95,
+            width=200
+        )
+        self.feather_slider.set(1)
+        self.feather_slider.pack(pady=5)
+
+        ctk.CTkLabel(
+            self.dialog,
+            text=self._("vignette_shape"),
+            font=("Arial", 14),
+            text_color=self.fg_color
+        ).pack(pady=5)
+        self.shape = ctk.CTkOptionMenu(
+            self.dialog,
+            values=[self._("vignette_shape_circular"), self._("vignette_shape_elliptical")],
+            font=("Arial", 14),
+            fg_color=self.button_fg_color,
+            text_color=self.fg_color
+        )
+        self.shape.set(self._("vignette_shape_circular"))
+        self.shape.pack(pady=5)
+
         ctk.CTkButton(
             self.dialog,
             text=self._("apply"),
@@ -485,26 +519,27 @@ class VignetteDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             intensity = self.intensity_slider.get()
+            feather = self.feather_slider.get()
+            shape_map = {
+                self._("vignette_shape_circular"): "circular",
+                self._("vignette_shape_elliptical"): "elliptical"
+            }
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_vignette(
-                self.processor.image if self.processor.image else self.processor.original_image,
-                intensity
+            self.run_effect(
+                self._("vignette_title").lower(),
+                self.processor.effects.apply_vignette,
+                intensity,
+                feather,
+                shape_map[self.shape.get()]
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("vignette_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class GlowDialog(BaseDialog):
     def create_dialog(self):
@@ -565,28 +600,22 @@ class GlowDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             radius = self.radius_slider.get()
             intensity = self.intensity_slider.get()
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_glow(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("glow_title").lower(),
+                self.processor.effects.apply_glow,
                 radius,
                 intensity
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("glow_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class InvertDialog(BaseDialog):
     def create_dialog(self):
@@ -631,26 +660,20 @@ class InvertDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             intensity = self.intensity_slider.get()
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_invert(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("invert_title").lower(),
+                self.processor.effects.apply_invert,
                 intensity
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("invert_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class EmbossDialog(BaseDialog):
     def create_dialog(self):
@@ -695,26 +718,20 @@ class EmbossDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             intensity = self.intensity_slider.get()
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_emboss(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("emboss_title").lower(),
+                self.processor.effects.apply_emboss,
                 intensity
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("emboss_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class BlurDialog(BaseDialog):
     def create_dialog(self):
@@ -775,7 +792,6 @@ class BlurDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             radius = self.radius_slider.get()
             type_map = {
                 self._("blur_type_gaussian"): "gaussian",
@@ -783,29 +799,24 @@ class BlurDialog(BaseDialog):
             }
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_blur(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("blur_title").lower(),
+                self.processor.effects.apply_blur,
                 radius,
                 type_map[self.blur_type.get()]
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("blur_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class OilPaintingDialog(BaseDialog):
     def create_dialog(self):
         super().create_dialog()
         self.dialog.title(self._("oil_painting_title"))
-        self.dialog.geometry("400x250")
+        self.dialog.geometry("400x330")
 
     def setup_widgets(self):
         ctk.CTkLabel(
@@ -847,6 +858,22 @@ class OilPaintingDialog(BaseDialog):
         self.intensity_slider.set(0.5)
         self.intensity_slider.pack(pady=5)
 
+        ctk.CTkLabel(
+            self.dialog,
+            text=self._("oil_painting_levels"),
+            font=("Arial", 14),
+            text_color=self.fg_color
+        ).pack(pady=5)
+        self.levels_slider = ctk.CTkSlider(
+            self.dialog,
+            from_=2,
+            to=40,
+            number_of_steps=38,
+            width=200
+        )
+        self.levels_slider.set(20)
+        self.levels_slider.pack(pady=5)
+
         ctk.CTkButton(
             self.dialog,
             text=self._("apply"),
@@ -860,28 +887,24 @@ class OilPaintingDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             radius = int(self.radius_slider.get())
             intensity = self.intensity_slider.get()
+            levels = int(self.levels_slider.get())
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_oil_painting(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("oil_painting_title").lower(),
+                self.processor.effects.apply_oil_painting,
                 radius,
-                intensity
+                intensity,
+                levels
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("oil_painting_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class SepiaDialog(BaseDialog):
     def create_dialog(self):
@@ -926,26 +949,20 @@ class SepiaDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             intensity = self.intensity_slider.get()
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_sepia(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("sepia_title").lower(),
+                self.processor.effects.apply_sepia,
                 intensity
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("sepia_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class GrayscaleDialog(BaseDialog):
     def create_dialog(self):
@@ -990,26 +1007,20 @@ class GrayscaleDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             intensity = self.intensity_slider.get()
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_grayscale(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("grayscale_title").lower(),
+                self.processor.effects.apply_grayscale,
                 intensity
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except Exception as e:
             CTkMessagebox(
                 title=self._("error"),
                 message=self._("effect_error", effect=self._("grayscale_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
 
 class PosterizeDialog(BaseDialog):
     def create_dialog(self):
@@ -1054,19 +1065,15 @@ class PosterizeDialog(BaseDialog):
 
     def apply(self):
         try:
-            self.ui.show_loading()
             levels = int(self.levels_entry.get())
             levels = max(2, min(8, levels))
             if not self.processor.image and not self.processor.original_image:
                 raise ValueError(self._("image_not_loaded"))
-            self.processor.image = self.processor.effects.apply_posterize(
-                self.processor.image if self.processor.image else self.processor.original_image,
+            self.run_effect(
+                self._("posterize_title").lower(),
+                self.processor.effects.apply_posterize,
                 levels
             )
-            self.processor.cached_image = None
-            self.processor.save_to_history()
-            self.update_callback(fast_mode=False)
-            self.dialog.destroy()
         except ValueError as e:
             CTkMessagebox(
                 title=self._("error"),
@@ -1079,5 +1086,168 @@ class PosterizeDialog(BaseDialog):
                 message=self._("effect_error", effect=self._("posterize_title").lower(), error=str(e)),
                 icon="icon.ico"
             )
-        finally:
-            self.ui.hide_loading()
\ No newline at end of file
+
+class EffectDialog(BaseDialog):
+    def __init__(self, parent, processor, update_callback, ui, spec, index=None, values=None):
+        self.spec = spec
+        self.index = index
+        self.values = values
+        self.inputs = []
+        super().__init__(parent, processor, update_callback, ui)
+
+    def create_dialog(self):
+        super().create_dialog()
+        self.dialog.title(self._(self.spec.label))
+        self.dialog.geometry(f"400x{160 + 70 * len(self.spec.params)}")
+
+    def param_label(self, param):
+        key = f"{self.spec.label}_{param.name}"
+        if key in self.translator.translations.get(self.lang, {}):
+            return self._(key)
+        return param.name.replace("_", " ").capitalize()
+
+    def setup_widgets(self):
+        ctk.CTkLabel(
+            self.dialog,
+            text=self._(self.spec.label),
+            font=("Arial", 20, "bold"),
+            text_color=self.fg_color
+        ).pack(pady=10)
+
+        for position, param in enumerate(self.spec.params):
+            value = param.default if self.values is None else self.values[position]
+            ctk.CTkLabel(
+                self.dialog,
+                text=self.param_label(param),
+                font=("Arial", 14),
+                text_color=self.fg_color
+            ).pack(pady=5)
+            if param.choices is not None:
+                widget = ctk.CTkOptionMenu(
+                    self.dialog,
+                    values=[str(choice) for choice in param.choices],
+                    font=("Arial", 14),
+                    fg_color=self.button_fg_color,
+                    text_color=self.fg_color
+                )
+                widget.set(str(value))
+            else:
+                low = param.low if param.low is not None else 0
+                high = param.high if param.high is not None else low + 100
+                widget = ctk.CTkSlider(
+                    self.dialog,
+                    from_=low,
+                    to=high,
+                    number_of_steps=int(high - low) if isinstance(param.default, int) else 100,
+                    width=200
+                )
+                widget.set(value)
+            widget.pack(pady=5)
+            self.inputs.append(widget)
+
+        ctk.CTkButton(
+            self.dialog,
+            text=self._("apply"),
+            command=self.apply,
+            font=("Arial", 14),
+            width=200,
+            height=40,
+            fg_color=self.button_fg_color,
+            text_color=self.fg_color
+        ).pack(pady=20)
+
+    def apply(self):
+        try:
+            if not self.processor.image and not self.processor.original_image:
+                raise ValueError(self._("image_not_loaded"))
+            values = [widget.get() for widget in self.inputs]
+            values = [round(value) if isinstance(param.default, int) else value
+                      for param, value in zip(self.spec.params, values)]
+            if self.index is not None:
+                self.update_effect(self._(self.spec.label).lower(), self.index, *self.spec.bind(values))
+            else:
+                self.run_effect(
+                    self._(self.spec.label).lower(),
+                    getattr(self.processor.effects, self.spec.name),
+                    *self.spec.bind(values)
+                )
+        except Exception as e:
+            CTkMessagebox(
+                title=self._("error"),
+                message=self._("effect_error", effect=self._(self.spec.label).lower(), error=str(e)),
+                icon="icon.ico"
+            )
+
+class OperationsDialog(BaseDialog):
+    def create_dialog(self):
+        super().create_dialog()
+        self.dialog.title(self._("operations"))
+        self.dialog.geometry(f"460x{120 + 45 * max(1, len(self.ui.current_operations()))}")
+
+    def setup_widgets(self):
+        ctk.CTkLabel(
+            self.dialog,
+            text=self._("operations"),
+            font=("Arial", 20, "bold"),
+            text_color=self.fg_color
+        ).pack(pady=10)
+
+        operations = self.ui.current_operations()
+        if not operations:
+            ctk.CTkLabel(
+                self.dialog,
+                text=self._("no_operations"),
+                font=("Arial", 14),
+                text_color=self.fg_color
+            ).pack(pady=5)
+        for index, operation in enumerate(operations):
+            spec = Effects.spec(operation.func)
+            row = ctk.CTkFrame(self.dialog, fg_color=self.bg_color)
+            row.pack(fill=tk.X, padx=10, pady=3)
+            ctk.CTkLabel(
+                row,
+                text=f"{index + 1}. {self._(spec.label) if spec else operation.name}",
+                font=("Arial", 14),
+                text_color=self.fg_color
+            ).pack(side=tk.LEFT, padx=5)
+            ctk.CTkButton(
+                row,
+                text=self._("remove"),
+                command=lambda index=index: self.remove(index),
+                font=("Arial", 12),
+                width=90,
+                fg_color=self.button_fg_color,
+                text_color=self.fg_color
+            ).pack(side=tk.RIGHT, padx=5)
+            if spec and spec.params:
+                ctk.CTkButton(
+                    row,
+                    text=self._("edit"),
+                    command=lambda index=index, spec=spec, operation=operation: self.edit(index, spec, operation),
+                    font=("Arial", 12),
+                    width=90,
+                    fg_color=self.button_fg_color,
+                    text_color=self.fg_color
+                ).pack(side=tk.RIGHT, padx=5)
+
+    def edit(self, index, spec, operation):
+        self.dialog.destroy()
+        EffectDialog(self.parent, self.processor, self.update_callback, self.ui, spec, index, operation.params)
+
+    def remove(self, index):
+        self.dialog.destroy()
+        self.ui.remove_effect(index, on_error=lambda error: self.effect_failed(self._("remove").lower(), error))
+
+EFFECT_DIALOGS = {
+    "apply_noise": NoiseDialog,
+    "apply_pixelation": PixelationDialog,
+    "apply_vignette": VignetteDialog,
+    "apply_glow": GlowDialog,
+    "apply_invert": InvertDialog,
+    "apply_emboss": EmbossDialog,
+    "apply_blur": BlurDialog,
+    "apply_oil_painting": OilPaintingDialog,
+    "apply_sepia": SepiaDialog,
+    "apply_grayscale": GrayscaleDialog,
+    "apply_posterize": PosterizeDialog
+}
\ No newline at end of file
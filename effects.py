@@ -1,11 +1,159 @@
 from PIL import Image, ImageFilter, ImageEnhance, ImageColor
 import numpy as np
 import cv2
+from blur_engine import BlurEngine
+from adjustment_engine import OpenCVAdjustmentEngine
+from intermediate_cache import IntermediateCache
+from image_buffer import ImageBuffer
+
+class EffectParam:
+    def __init__(self, name, default, low=None, high=None, choices=None):
+        self.name = name
+        self.default = default
+        self.low = low
+        self.high = high
+        self.choices = choices
+
+    def coerce(self, value):
+        if self.choices is not None:
+            if value not in self.choices:
+                raise ValueError(f"Параметр {self.name}: допустимые значения {', '.join(map(str, self.choices))}")
+            return value
+        value = int(value) if isinstance(self.default, int) else float(value)
+        if (self.low is not None and value < self.low) or (self.high is not None and value > self.high):
+            raise ValueError(f"Параметр {self.name} вне диапазона {self.low}..{self.high}")
+        return value
+
+
+class EffectSpec:
+    POINTWISE = "pointwise"
+    NEIGHBOURHOOD = "neighbourhood"
+    GLOBAL = "global"
+
+    def __init__(self, name, label, params, kind, halo=None, cost=0.0, cached=False, menu=True):
+        self.name = name
+        self.label = label
+        self.params = params
+        self.kind = kind
+        self.halo = halo
+        self.cost = cost
+        self.cached = cached
+        self.menu = menu and label is not None
+
+    def halo_for(self, params):
+        if self.kind == self.POINTWISE:
+            return 0
+        if self.kind == self.NEIGHBOURHOOD:
+            return self.halo(*params)
+        return None
+
+    def estimate(self, megapixels):
+        return self.cost * megapixels
+
+    def bind(self, values=()):
+        if isinstance(values, dict):
+            unknown = set(values) - {param.name for param in self.params}
+            if unknown:
+                raise ValueError(f"Неизвестные параметры {self.label}: {', '.join(sorted(unknown))}")
+            values = [values.get(param.name, param.default) for param in self.params]
+        if len(values) > len(self.params):
+            raise ValueError(f"Слишком много параметров для {self.label}: {len(values)}")
+        values = list(values) + [param.default for param in self.params[len(values):]]
+        return tuple(param.coerce(value) for param, value in zip(self.params, values))
+
+
+def adjustment_spec(name, cost):
+    return EffectSpec(name, None, [EffectParam("factor", 0.0, -1.0, 1.0)], EffectSpec.POINTWISE, cost=cost)
+
 
 class Effects:
+    cache = IntermediateCache()
+    buffer = ImageBuffer()
+    hue_engine = OpenCVAdjustmentEngine()
+    REGISTRY = {spec.name: spec for spec in [
+        EffectSpec("apply_noise", "noise",
+                   [EffectParam("noise_level", 0.5, 0.0, 1.0), EffectParam("noise_type", "gaussian",
+                                                                           choices=["gaussian", "salt_pepper"])],
+                   EffectSpec.POINTWISE, cost=110),
+        EffectSpec("apply_pixelation", "pixelation", [EffectParam("block_size", 10, 1)], EffectSpec.GLOBAL, cost=5),
+        EffectSpec("apply_vignette", "vignette",
+                   [EffectParam("intensity", 0.5, 0.0, 1.0), EffectParam("feather", 1.0, 0.0, 1.0),
+                    EffectParam("shape", "circular", choices=["circular", "elliptical"])],
+                   EffectSpec.GLOBAL, cost=25),
+        EffectSpec("apply_glow", "glow", [EffectParam("radius", 5.0, 0.0, 100.0), EffectParam("intensity", 0.5, 0.0, 1.0)],
+                   EffectSpec.NEIGHBOURHOOD, lambda radius, intensity: BlurEngine.halo(radius), 25, True),
+        EffectSpec("apply_invert", "invert", [EffectParam("intensity", 1.0, 0.0, 1.0)], EffectSpec.POINTWISE, cost=9),
+        EffectSpec("apply_emboss", "emboss", [EffectParam("intensity", 1.0, 0.0, 1.0)],
+                   EffectSpec.NEIGHBOURHOOD, lambda intensity: 1, 40),
+        EffectSpec("apply_blur", "blur",
+                   [EffectParam("radius", 2.0, 0.0, 100.0), EffectParam("blur_type", "gaussian",
+                                                                        choices=["gaussian", "box"])],
+                   EffectSpec.NEIGHBOURHOOD, lambda radius, blur_type: BlurEngine.halo(radius, blur_type), 15),
+        EffectSpec("apply_oil_painting", "oil_painting",
+                   [EffectParam("radius", 3, 1, 10), EffectParam("intensity", 1.0, 0.0, 1.0),
+                    EffectParam("levels", 20, 2, 40)],
+                   EffectSpec.NEIGHBOURHOOD, lambda radius, intensity, levels: radius, 160),
+        EffectSpec("apply_sepia", "sepia", [EffectParam("intensity", 1.0, 0.0, 1.0)], EffectSpec.POINTWISE, cost=5),
+        EffectSpec("apply_grayscale", "grayscale", [EffectParam("intensity", 1.0, 0.0, 1.0)],
+                   EffectSpec.POINTWISE, cost=8, cached=True),
+        EffectSpec("apply_posterize", "posterize", [EffectParam("levels", 4, 2, 256)], EffectSpec.GLOBAL, cost=125),
+        EffectSpec("apply_details", "details", [EffectParam("intensity", 0.5, 0.0, 1.0)],
+                   EffectSpec.NEIGHBOURHOOD, lambda intensity: BlurEngine.halo(2), 28, True, False),
+        EffectSpec("apply_sharpen", "sharpen", [EffectParam("intensity", 0.5, 0.0, 1.0)],
+                   EffectSpec.NEIGHBOURHOOD, lambda intensity: 1, 25, menu=False),
+        EffectSpec("apply_noise_reduction", "noise_reduction", [EffectParam("intensity", 0.5, 0.0, 1.0)],
+                   EffectSpec.NEIGHBOURHOOD, lambda intensity: 3, 40, menu=False),
+        EffectSpec("apply_smoothing", "smoothing", [EffectParam("intensity", 0.5, 0.0, 1.0)],
+                   EffectSpec.NEIGHBOURHOOD, lambda intensity: BlurEngine.halo(intensity * 5), 10, True, False),
+        adjustment_spec("adjust_brightness", 5),
+        EffectSpec("adjust_contrast", None, [EffectParam("factor", 0.0, -1.0, 1.0)], EffectSpec.GLOBAL, cost=9),
+        adjustment_spec("adjust_saturation", 8),
+        adjustment_spec("adjust_white_balance", 25),
+        adjustment_spec("adjust_hue", 2),
+        adjustment_spec("adjust_temperature", 24),
+        adjustment_spec("adjust_exposure", 20),
+        adjustment_spec("adjust_shadows", 46),
+        adjustment_spec("adjust_highlights", 50),
+        adjustment_spec("adjust_blacks", 19),
+        adjustment_spec("adjust_whites", 16),
+        adjustment_spec("adjust_warmth", 23)
+    ]}
+
+    @classmethod
+    def spec(cls, func):
+        name = getattr(func, "__name__", None)
+        spec = cls.REGISTRY.get(name)
+        if spec is None or func is not getattr(cls, name):
+            return None
+        return spec
+
+    @classmethod
+    def menu_effects(cls):
+        return [spec for spec in cls.REGISTRY.values() if spec.menu]
+
+    @classmethod
+    def find(cls, label):
+        for spec in cls.REGISTRY.values():
+            if spec.label == label:
+                return spec
+        return None
+
+    @classmethod
+    def halo(cls, func, params):
+        spec = cls.spec(func)
+        return spec.halo_for(params) if spec else None
+
+    @classmethod
+    def blurred(cls, image, radius):
+        return cls.cache.get(image, "gaussian", (radius,), lambda: BlurEngine.gaussian(cls.buffer.view(image), radius))
+
+    @classmethod
+    def grayscale(cls, image):
+        return cls.cache.get(image, "grayscale", (), lambda: np.asarray(image.convert("L")))
+
     @staticmethod
     def apply_noise(image, noise_level, noise_type):
-        img_array = np.array(image)
+        img_array = Effects.buffer.view(image)
         if noise_type == "gaussian":
             noise = np.random.normal(0, noise_level * 255, img_array.shape).astype(np.uint8)
             noise = np.clip(noise, 0, 255)
@@ -15,137 +163,160 @@ class Effects:
             noisy_img = img_array.copy()
             noisy_img[noise < noise_level / 2] = 0
             noisy_img[noise > 1 - noise_level / 2] = 255
-        return Image.fromarray(noisy_img)
+        return Effects.buffer.wrap(noisy_img)
 
     @staticmethod
     def apply_pixelation(image, block_size):
-        img = image.copy()
-        width, height = img.size
-        img = img.resize((width // block_size, height // block_size), Image.Resampling.NEAREST)
+        width, height = image.size
+        img = image.resize((width // block_size, height // block_size), Image.Resampling.NEAREST)
         img = img.resize((width, height), Image.Resampling.NEAREST)
         return img
 
     @staticmethod
-    def apply_vignette(image, intensity):
-        img_array = np.array(image)
-        height, width = img_array.shape[:2]
-        x, y = np.meshgrid(np.arange(width), np.arange(height))
-        center_x, center_y = width / 2, height / 2
-        distance = np.sqrt((x - center_x)**2 + (y - center_y)**2)
-        max_distance = np.sqrt(center_x**2 + center_y**2)
-        vignette = 1 - (distance / max_distance) * intensity
-        vignette = np.clip(vignette, 0, 1)
-        if len(img_array.shape) == 3:
-            vignette = vignette[:, :, np.newaxis]
-        vignette_img = (img_array * vignette).astype(np.uint8)
-        return Image.fromarray(vignette_img)
+    def blend(base, other, intensity, out=None):
+        if other.shape != base.shape:
+            other = np.ascontiguousarray(np.broadcast_to(other, base.shape))
+        return cv2.addWeighted(base, 1 - intensity, other, intensity, 0, dst=out)
+
+    @classmethod
+    def vignette_field(cls, width, height, shape="circular"):
+        def compute():
+            x = np.arange(width, dtype=np.float32) - np.float32(width / 2)
+            y = np.arange(height, dtype=np.float32)[:, np.newaxis] - np.float32(height / 2)
+            if shape == "elliptical":
+                x /= np.float32(width / 2 * np.sqrt(2))
+                y /= np.float32(height / 2 * np.sqrt(2))
+            else:
+                scale = np.float32(np.hypot(width / 2, height / 2))
+                x /= scale
+                y /= scale
+            return np.hypot(x, y)
+        return cls.cache.lookup(("vignette_field", width, height, shape), compute)
+
+    @staticmethod
+    def apply_vignette(image, intensity, feather=1.0, shape="circular"):
+        img_array = Effects.buffer.view(image)
+        feather = max(float(feather), 1e-3)
+        field = Effects.vignette_field(image.width, image.height, shape)
+        mask = np.subtract(field, np.float32(1 - feather), out=Effects.buffer.scratch("vignette", field.shape))
+        mask *= np.float32(-intensity / feather)
+        np.minimum(mask, 0, out=mask)
+        mask += 1
+        np.maximum(mask, 0, out=mask)
+        if img_array.ndim == 3:
+            mask = mask[:, :, np.newaxis]
+        vignette_img = np.empty_like(img_array)
+        np.multiply(img_array, mask, out=vignette_img, casting="unsafe")
+        return Effects.buffer.wrap(vignette_img)
 
     @staticmethod
     def apply_glow(image, radius, intensity):
-        img = image.copy()
-        blurred = img.filter(ImageFilter.GaussianBlur(radius=radius))
-        img_array = np.array(img)
-        blurred_array = np.array(blurred)
-        glow = (blurred_array + img_array * intensity).clip(0, 255).astype(np.uint8)
-        return Image.fromarray(glow)
+        img_array = Effects.buffer.view(image)
+        return Effects.buffer.wrap(cv2.addWeighted(Effects.blurred(image, radius), 1, img_array, intensity, 0))
 
     @staticmethod
     def apply_invert(image, intensity):
-        img_array = np.array(image)
-        inverted = 255 - img_array
-        result = (img_array * (1 - intensity) + inverted * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        img_array = Effects.buffer.view(image)
+        inverted = cv2.bitwise_not(img_array)
+        return Effects.buffer.wrap(Effects.blend(img_array, inverted, intensity, out=inverted))
 
     @staticmethod
     def apply_emboss(image, intensity):
-        img = image.copy()
-        embossed = img.filter(ImageFilter.EMBOSS)
-        img_array = np.array(img)
-        embossed_array = np.array(embossed)
-        result = (img_array * (1 - intensity) + embossed_array * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        embossed = image.filter(ImageFilter.EMBOSS)
+        return Effects.buffer.wrap(Effects.blend(Effects.buffer.view(image), np.asarray(embossed), intensity))
 
     @staticmethod
     def apply_blur(image, radius, blur_type):
-        img = image.copy()
-        if blur_type == "gaussian":
-            return img.filter(ImageFilter.GaussianBlur(radius=radius))
-        elif blur_type == "box":
-            return img.filter(ImageFilter.BoxBlur(radius=radius))
+        if blur_type in ("gaussian", "box"):
+            return Effects.buffer.wrap(BlurEngine.blur_array(Effects.buffer.view(image), radius, blur_type))
 
     @staticmethod
-    def apply_oil_painting(image, radius, intensity):
-        img_array = np.array(image)
-        height, width = img_array.shape[:2]
+    def apply_oil_painting(image, radius, intensity=1.0, levels=20):
+        img_array = Effects.buffer.view(image)
+        rgb = np.ascontiguousarray(img_array[..., :3])
+        levels = max(1, int(levels))
+        size = 2 * radius + 1
+        ksize = (size, size)
+        depth, dtype = (cv2.CV_16U, np.uint16) if size * size * 255 < 65536 else (cv2.CV_32S, np.int32)
+
+        total = rgb[..., 0].astype(np.uint16)
+        total += rgb[..., 1]
+        total += rgb[..., 2]
+        bins = (np.arange(766) * levels // 768).astype(np.uint8)[total]
+        present = np.flatnonzero(np.bincount(bins.ravel(), minlength=levels))
+
+        best_count = np.zeros(bins.shape, dtype=dtype)
+        best_level = np.zeros(bins.shape, dtype=np.uint8)
+        for level in present:
+            mask = np.equal(bins, level).view(np.uint8)
+            count = cv2.boxFilter(mask, depth, ksize, normalize=False, borderType=cv2.BORDER_CONSTANT)
+            np.putmask(best_level, count > best_count, level)
+            np.maximum(best_count, count, out=best_count)
+
+        sums = np.zeros(rgb.shape, dtype=dtype)
+        for level in present:
+            selected = np.equal(best_level, level).view(np.uint8)
+            if not selected.any():
+                continue
+            masked = cv2.bitwise_and(rgb, rgb, mask=np.equal(bins, level).view(np.uint8))
+            window = cv2.boxFilter(masked, depth, ksize, normalize=False, borderType=cv2.BORDER_CONSTANT)
+            cv2.copyTo(window, selected, sums)
+
+        painted = sums.astype(np.float32) / best_count[..., np.newaxis]
         result = img_array.copy()
-        for y in range(radius, height - radius):
-            for x in range(radius, width - radius):
-                region = img_array[y - radius:y + radius + 1, x - radius:x + radius + 1]
-                avg_color = np.mean(region, axis=(0, 1)).astype(np.uint8)
-                result[y, x] = (result[y, x] * (1 - intensity) + avg_color * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        result[..., :3] = (rgb * np.float32(1 - intensity) + painted * np.float32(intensity)).astype(np.uint8)
+        return Effects.buffer.wrap(result)
 
     @staticmethod
     def apply_sepia(image, intensity):
-        img_array = np.array(image)
+        img_array = Effects.buffer.view(image)
         sepia_matrix = np.array([[0.393, 0.769, 0.189],
                                  [0.349, 0.686, 0.168],
                                  [0.272, 0.534, 0.131]])
-        sepia_img = np.dot(img_array[..., :3], sepia_matrix.T).clip(0, 255).astype(np.uint8)
-        result = (img_array * (1 - intensity) + sepia_img * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        sepia_img = cv2.transform(img_array, sepia_matrix)
+        return Effects.buffer.wrap(Effects.blend(img_array, sepia_img, intensity, out=sepia_img))
 
     @staticmethod
     def apply_grayscale(image, intensity):
-        img = image.copy()
-        grayscale = img.convert("L").convert("RGB")
-        img_array = np.array(img)
-        grayscale_array = np.array(grayscale)
-        result = (img_array * (1 - intensity) + grayscale_array * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        img_array = Effects.buffer.view(image)
+        grayscale_array = Effects.grayscale(image)
+        if img_array.ndim == 3:
+            grayscale_array = cv2.merge([grayscale_array] * img_array.shape[2])
+        return Effects.buffer.wrap(Effects.blend(img_array, grayscale_array, intensity, out=grayscale_array
+                                                 if img_array.ndim == 3 else None))
 
     @staticmethod
     def apply_posterize(image, levels):
-        img = image.copy()
-        return img.convert("P", palette=Image.Palette.ADAPTIVE, colors=levels).convert("RGB")
+        return image.convert("P", palette=Image.Palette.ADAPTIVE, colors=levels).convert("RGB")
 
     @staticmethod
     def apply_details(image, intensity):
-        img = image.copy()
-        enhanced = img.filter(ImageFilter.UnsharpMask(radius=2, percent=int(150 * intensity), threshold=3))
-        img_array = np.array(img)
-        enhanced_array = np.array(enhanced)
-        result = (img_array * (1 - intensity) + enhanced_array * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        img_array = Effects.buffer.view(image)
+        blurred_array = Effects.blurred(image, 2)
+        amount = int(150 * intensity) / 100
+        enhanced_array = cv2.addWeighted(img_array, 1 + amount, blurred_array, -amount, 0)
+        difference = Effects.buffer.scratch("details", img_array.shape, np.uint8)
+        cv2.absdiff(img_array, blurred_array, dst=difference)
+        np.copyto(enhanced_array, img_array, where=difference < 3)
+        return Effects.buffer.wrap(Effects.blend(img_array, enhanced_array, intensity, out=enhanced_array))
 
     @staticmethod
     def apply_sharpen(image, intensity):
-        img = image.copy()
-        sharpened = img.filter(ImageFilter.SHARPEN)
-        img_array = np.array(img)
-        sharpened_array = np.array(sharpened)
-        result = (img_array * (1 - intensity) + sharpened_array * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        sharpened = image.filter(ImageFilter.SHARPEN)
+        return Effects.buffer.wrap(Effects.blend(Effects.buffer.view(image), np.asarray(sharpened), intensity))
 
     @staticmethod
     def apply_noise_reduction(image, intensity):
-        img = image.copy()
-        img_array = np.array(img)
+        img_array = Effects.buffer.view(image)
         kernel_size = 3 + int(4 * intensity)
         kernel_size = kernel_size if kernel_size % 2 == 1 else kernel_size + 1
         denoised = cv2.medianBlur(img_array, kernel_size)
-        result = (img_array * (1 - intensity) + denoised * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        return Effects.buffer.wrap(Effects.blend(img_array, denoised, intensity, out=denoised))
 
     @staticmethod
     def apply_smoothing(image, intensity):
-        img = image.copy()
-        radius = intensity * 5
-        smoothed = img.filter(ImageFilter.GaussianBlur(radius=radius))
-        img_array = np.array(img)
-        smoothed_array = np.array(smoothed)
-        result = (img_array * (1 - intensity) + smoothed_array * intensity).astype(np.uint8)
-        return Image.fromarray(result)
+        img_array = Effects.buffer.view(image)
+        return Effects.buffer.wrap(Effects.blend(img_array, Effects.blurred(image, intensity * 5), intensity))
 
     @staticmethod
     def adjust_brightness(image, factor):
@@ -164,7 +335,7 @@ class Effects:
 
     @staticmethod
     def adjust_white_balance(image, factor):
-        img_array = np.array(image).astype(np.float32)
+        img_array = Effects.buffer.view(image).astype(np.float32)
         if factor > 0:
             img_array[:, :, 2] = img_array[:, :, 2] * (1 + factor)
             img_array[:, :, 0] = img_array[:, :, 0] * (1 - factor)
@@ -172,18 +343,15 @@ class Effects:
             img_array[:, :, 0] = img_array[:, :, 0] * (1 - factor)
             img_array[:, :, 2] = img_array[:, :, 2] * (1 + factor)
         img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def adjust_hue(image, factor):
-        img_array = np.array(image.convert("HSV")).astype(np.float32)
-        img_array[:, :, 0] = (img_array[:, :, 0] + factor * 180) % 360
-        img_array = img_array.astype(np.uint8)
-        return Image.fromarray(img_array, mode="HSV").convert("RGB")
+        return Effects.buffer.wrap(Effects.hue_engine.apply_array(Effects.buffer.view(image), {"hue": factor}))
 
     @staticmethod
     def adjust_temperature(image, factor):
-        img_array = np.array(image).astype(np.float32)
+        img_array = Effects.buffer.view(image).astype(np.float32)
         if factor > 0:
             img_array[:, :, 2] = img_array[:, :, 2] * (1 + factor)
             img_array[:, :, 0] = img_array[:, :, 0] * (1 - factor * 0.5)
@@ -191,54 +359,54 @@ class Effects:
             img_array[:, :, 0] = img_array[:, :, 0] * (1 - factor)
             img_array[:, :, 2] = img_array[:, :, 2] * (1 + factor * 0.5)
         img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def adjust_exposure(image, factor):
-        img_array = np.array(image).astype(np.float32)
-        img_array = img_array * (1 + factor)
-        img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        img_array = Effects.buffer.view(image).astype(np.float32)
+        img_array *= 1 + factor
+        img_array = np.clip(img_array, 0, 255, out=img_array).astype(np.uint8)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def adjust_shadows(image, factor):
-        img_array = np.array(image).astype(np.float32)
+        img_array = Effects.buffer.view(image).astype(np.float32)
         mask = img_array < 128
         if factor > 0:
             img_array[mask] = img_array[mask] * (1 + factor)
         else:
             img_array[mask] = img_array[mask] * (1 + factor)
         img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def adjust_highlights(image, factor):
-        img_array = np.array(image).astype(np.float32)
+        img_array = Effects.buffer.view(image).astype(np.float32)
         mask = img_array > 128
         if factor > 0:
             img_array[mask] = img_array[mask] * (1 + factor)
         else:
             img_array[mask] = img_array[mask] * (1 + factor)
         img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def adjust_blacks(image, factor):
-        img_array = np.array(image).astype(np.float32)
-        img_array = img_array + factor * 50
-        img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        img_array = Effects.buffer.view(image).astype(np.float32)
+        img_array += factor * 50
+        img_array = np.clip(img_array, 0, 255, out=img_array).astype(np.uint8)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def adjust_whites(image, factor):
-        img_array = np.array(image).astype(np.float32)
-        img_array = img_array + factor * 50
-        img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        img_array = Effects.buffer.view(image).astype(np.float32)
+        img_array += factor * 50
+        img_array = np.clip(img_array, 0, 255, out=img_array).astype(np.uint8)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def adjust_warmth(image, factor):
-        img_array = np.array(image).astype(np.float32)
+        img_array = Effects.buffer.view(image).astype(np.float32)
         if factor > 0:
             img_array[:, :, 2] = img_array[:, :, 2] * (1 + factor)
             img_array[:, :, 1] = img_array[:, :, 1] * (1 + factor * 0.5)
@@ -246,12 +414,12 @@ class Effects:
             img_array[:, :, 0] = img_array[:, :, 0] * (1 - factor)
             img_array[:, :, 1] = img_array[:, :, 1] * (1 - factor * 0.5)
         img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+        return Effects.buffer.wrap(img_array)
 
     @staticmethod
     def match_colors(source, reference):
-        source_array = np.array(source).astype(np.float32)
-        reference_array = np.array(reference).astype(np.float32)
+        source_array = Effects.buffer.view(source).astype(np.float32)
+        reference_array = Effects.buffer.view(reference).astype(np.float32)
         source_mean = np.mean(source_array, axis=(0, 1))
         reference_mean = np.mean(reference_array, axis=(0, 1))
         source_std = np.std(source_array, axis=(0, 1))
@@ -259,4 +427,4 @@ class Effects:
         source_array = (source_array - source_mean) / source_std
         source_array = source_array * reference_std + reference_mean
         source_array = np.clip(source_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(source_array)
\ No newline at end of file
+        return Effects.buffer.wrap(source_array)
\ No newline at end of file
@@ -0,0 +1,196 @@
+import math
+import os
+import struct
+import zlib
+import numpy as np
+from PIL import Image
+from effects import Effects
+
+
+class TiffStripWriter:
+    def __init__(self, path, width, height, bands):
+        self.width = width
+        self.height = height
+        self.bands = bands
+        self.bigtiff = width * height * bands > 2 ** 32 - 2 ** 24
+        self.rows = height
+        self.offsets = []
+        self.counts = []
+        self.file = open(path, "wb")
+        if self.bigtiff:
+            self.file.write(b"II+\x00" + struct.pack("<HHQ", 8, 0, 0))
+        else:
+            self.file.write(b"II*\x00" + struct.pack("<I", 0))
+
+    def write(self, strip):
+        data = np.ascontiguousarray(strip).tobytes()
+        if not self.offsets:
+            self.rows = strip.shape[0]
+        self.offsets.append(self.file.tell())
+        self.counts.append(len(data))
+        self.file.write(data)
+
+    def _blob(self, values, code):
+        position = self.file.tell()
+        self.file.write(struct.pack(f"<{len(values)}{code}", *values))
+        return position
+
+    def close(self):
+        big = self.bigtiff
+        offset_type, offset_code = (16, "Q") if big else (4, "I")
+        inline = 8 if big else 4
+        if self.file.tell() % 2:
+            self.file.write(b"\x00")
+
+        def entry(tag, kind, code, values):
+            size = struct.calcsize(code) * len(values)
+            if size <= inline:
+                payload = struct.pack(f"<{len(values)}{code}", *values).ljust(inline, b"\x00")
+            else:
+                payload = struct.pack("<Q" if big else "<I", self._blob(values, code))
+            return tag, kind, len(values), payload
+
+        entries = [
+            entry(256, 4, "I", [self.width]),
+            entry(257, 4, "I", [self.height]),
+            entry(258, 3, "H", [8] * self.bands),
+            entry(259, 3, "H", [1]),
+            entry(262, 3, "H", [2 if self.bands >= 3 else 1]),
+            entry(273, offset_type, offset_code, self.offsets),
+            entry(277, 3, "H", [self.bands]),
+            entry(278, 4, "I", [self.rows]),
+            entry(279, offset_type, offset_code, self.counts),
+            entry(284, 3, "H", [1])
+        ]
+        if self.bands == 4:
+            entries.append(entry(338, 3, "H", [2]))
+        if self.file.tell() % 2:
+            self.file.write(b"\x00")
+        ifd = self.file.tell()
+        self.file.write(struct.pack("<Q" if big else "<H", len(entries)))
+        for tag, kind, count, payload in entries:
+            self.file.write(struct.pack("<HHQ" if big else "<HHI", tag, kind, count) + payload)
+        self.file.write(struct.pack("<Q" if big else "<I", 0))
+        self.file.seek(8 if big else 4)
+        self.file.write(struct.pack("<Q" if big else "<I", ifd))
+        self.file.close()
+
+
+class PngStreamWriter:
+    COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+    def __init__(self, path, width, height, bands, level=6):
+        self.width = width
+        self.bands = bands
+        self.compressor = zlib.compressobj(level)
+        self.previous = np.zeros((1, width * bands), dtype=np.uint8)
+        self.file = open(path, "wb")
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, self.COLOR_TYPES[bands], 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind + data)
+        self.file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def write(self, strip):
+        rows = np.ascontiguousarray(strip).reshape(strip.shape[0], -1)
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2
+        np.subtract(rows, np.concatenate([self.previous, rows[:-1]]), out=filtered[:, 1:])
+        self.previous = rows[-1:].copy()
+        data = self.compressor.compress(filtered.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+
+    def close(self):
+        self._chunk(b"IDAT", self.compressor.flush())
+        self._chunk(b"IEND", b"")
+        self.file.close()
+
+
+class StreamingExporter:
+    WRITERS = {".tif": TiffStripWriter, ".tiff": TiffStripWriter, ".png": PngStreamWriter}
+
+    def __init__(self, processor, operations=(), strip_height=256):
+        self.processor = processor
+        self.operations = operations
+        self.strip_height = strip_height
+        self.halo = sum(self.operation_halo(operation) for operation in operations)
+
+    @classmethod
+    def supports(cls, file_path):
+        return os.path.splitext(file_path)[1].lower() in cls.WRITERS
+
+    @staticmethod
+    def operation_halo(operation):
+        return Effects.halo(operation.func, operation.params)
+
+    @classmethod
+    def can_stream(cls, operations, processor):
+        if processor.engine.needs_means(processor.adjustments):
+            return not operations
+        return all(cls.operation_halo(operation) is not None for operation in operations)
+
+    def source_rows(self, top, bottom):
+        image = self.processor.image
+        if not self.operations:
+            return image.crop((0, top, image.width, bottom))
+        start, end = max(0, top - self.halo), min(image.height, bottom + self.halo)
+        rows = image.crop((0, start, image.width, end))
+        for operation in self.operations:
+            rows = operation.func(rows, *operation.params)
+        return rows.crop((0, top - start, image.width, bottom - start))
+
+    def geometry_strip(self, top, bottom):
+        processor = self.processor
+        out_width = processor.get_output_size()[0]
+        scale_x, scale_y, offset_x, offset_y, valid = processor.get_geometry_transform()
+        strip = Image.new(processor.image.mode, (out_width, bottom - top), (0, 0, 0))
+        valid_top, valid_bottom = max(top, valid[1]), min(bottom, valid[3])
+        if valid_bottom > valid_top:
+            source_box = [valid[0] * scale_x + offset_x, valid_top * scale_y + offset_y,
+                          valid[2] * scale_x + offset_x, valid_bottom * scale_y + offset_y]
+            size = (valid[2] - valid[0], valid_bottom - valid_top)
+            support = math.ceil(3 * max(1.0, scale_y)) + 1
+            first = max(0, math.floor(source_box[1]) - support)
+            last = min(processor.image.height, math.ceil(source_box[3]) + support)
+            rows = self.source_rows(first, last)
+            source_box[1] -= first
+            source_box[3] -= first
+            if all(float(v).is_integer() for v in source_box) and \
+                    (source_box[2] - source_box[0], source_box[3] - source_box[1]) == size:
+                region = rows.crop(tuple(int(v) for v in source_box))
+            else:
+                region = rows.resize(size, Image.Resampling.LANCZOS, box=tuple(source_box))
+            strip.paste(region, (valid[0], valid_top - top))
+        return strip
+
+    def frame_means(self):
+        if not self.processor.engine.needs_means(self.processor.adjustments):
+            return None
+        width, height = self.processor.get_output_size()
+        total = np.zeros(3)
+        for top in range(0, height, self.strip_height):
+            strip = np.asarray(self.geometry_strip(top, min(top + self.strip_height, height)))
+            total += strip[..., :3].reshape(-1, 3).sum(axis=0, dtype=np.float64)
+        return (total / (width * height)).astype(np.float32)
+
+    def render_strip(self, top, bottom, means=None):
+        return self.processor.apply_adjustments(self.geometry_strip(top, bottom), means)
+
+
+    def strips(self):
+        height = self.processor.get_output_size()[1]
+        means = self.frame_means()
+        for top in range(0, height, self.strip_height):
+            yield top, self.render_strip(top, min(top + self.strip_height, height), means)
+
+    def export(self, file_path):
+        width, height = self.processor.get_output_size()
+        bands = len(self.processor.image.getbands())
+        writer = self.WRITERS[os.path.splitext(file_path)[1].lower()](file_path, width, height, bands)
+        try:
+            for _, strip in self.strips():
+                writer.write(np.asarray(strip))
+        finally:
+            writer.close()
@@ -0,0 +1,188 @@
+import tempfile
+import numpy as np
+import cv2
+from PIL import Image
+
+
+class HistoryEntry:
+    def __init__(self, shape, mode, keyframe, label=None, state=None):
+        self.shape = shape
+        self.mode = mode
+        self.keyframe = keyframe
+        self.label = label
+        self.state = state
+        self.tiles = {}
+
+
+class HistoryStore:
+    def __init__(self, memory_budget=256 * 1024 * 1024, max_entries=10, tile_size=256):
+        self.memory_budget = memory_budget
+        self.max_entries = max_entries
+        self.tile_size = tile_size
+        self.entries = []
+        self.index = -1
+        self.current = None
+        self.resident = 0
+        self.scratch = None
+        self.scratch_size = 0
+        self.spilled = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def memory_usage(self):
+        return self.resident
+
+    @property
+    def state(self):
+        return self.entries[self.index].state if self.entries else None
+
+    def clear(self):
+        self.entries = []
+        self.index = -1
+        self.current = None
+        self.resident = 0
+        self._reset_scratch()
+
+    def can_undo(self):
+        return self.index > 0
+
+    def can_redo(self):
+        return self.index < len(self.entries) - 1
+
+    def push(self, image, label=None, state=None):
+        keyframe = self.current is None or self.current.mode != image.mode or self.current.size != image.size
+        bands = len(image.getbands())
+        shape = (image.height, image.width) if bands == 1 else (image.height, image.width, bands)
+        entry = HistoryEntry(shape, image.mode, keyframe, label, state)
+        for key, tile in self._changed_tiles(None if keyframe else self.current, image):
+            entry.tiles[key] = tile
+            self.resident += tile.nbytes
+
+        for dropped in self.entries[self.index + 1:]:
+            self._release(dropped.tiles.values())
+        self.entries = self.entries[:self.index + 1]
+        self.entries.append(entry)
+        self.index += 1
+        self.current = image
+
+        while len(self.entries) > self.max_entries:
+            self._merge_oldest()
+        self._enforce_budget()
+
+    def undo(self):
+        if not self.can_undo():
+            return None
+        self.index -= 1
+        self.current = self.reconstruct(self.index)
+        return self.current
+
+    def redo(self):
+        if not self.can_redo():
+            return None
+        self.index += 1
+        self.current = self.reconstruct(self.index)
+        return self.current
+
+    def reconstruct(self, index):
+        start = index
+        while not self.entries[start].keyframe:
+            start -= 1
+        tiles = {}
+        for entry in self.entries[start:index + 1]:
+            tiles.update(entry.tiles)
+        scratch = None
+        if self.scratch is not None and any(isinstance(tile, tuple) for tile in tiles.values()):
+            self.scratch.flush()
+            scratch = np.memmap(self.scratch, dtype=np.uint8, mode="r", shape=(self.scratch_size,))
+        entry = self.entries[index]
+        canvas = np.empty(entry.shape, dtype=np.uint8)
+        for (tile_x, tile_y), tile in tiles.items():
+            if isinstance(tile, tuple):
+                offset, shape = tile
+                tile = scratch[offset:offset + int(np.prod(shape))].reshape(shape)
+            left, top = tile_x * self.tile_size, tile_y * self.tile_size
+            canvas[top:top + tile.shape[0], left:left + tile.shape[1]] = tile
+        return Image.fromarray(canvas, entry.mode)
+
+    def _changed_tiles(self, previous, image):
+        width, height = image.size
+        size = self.tile_size
+        columns = np.arange(0, width, size)
+        for top in range(0, height, size):
+            bottom = min(top + size, height)
+            strip = np.asarray(image.crop((0, top, width, bottom)))
+            if previous is None:
+                changed = np.ones(len(columns), dtype=bool)
+            else:
+                diff = cv2.absdiff(np.asarray(previous.crop((0, top, width, bottom))), strip)
+                column_max = cv2.reduce(diff.reshape(bottom - top, -1), 0, cv2.REDUCE_MAX).reshape(width, -1)
+                changed = np.maximum.reduceat(column_max.max(axis=1), columns) > 0
+            for tile_x in np.flatnonzero(changed):
+                left = int(columns[tile_x])
+                yield (int(tile_x), top // size), strip[:, left:left + size].copy()
+
+    def _merge_oldest(self):
+        oldest, successor = self.entries[0], self.entries[1]
+        if successor.keyframe:
+            self._release(oldest.tiles.values())
+        else:
+            self._release(oldest.tiles[key] for key in successor.tiles if key in oldest.tiles)
+            oldest.tiles.update(successor.tiles)
+            successor.tiles = oldest.tiles
+            successor.keyframe = True
+        del self.entries[0]
+        self.index -= 1
+        self._compact()
+
+    def _release(self, tiles):
+        for tile in tiles:
+            if isinstance(tile, tuple):
+                self.spilled -= int(np.prod(tile[1]))
+            else:
+                self.resident -= tile.nbytes
+
+    def _enforce_budget(self):
+        for entry in self.entries:
+            if self.resident <= self.memory_budget:
+                break
+            for key, tile in entry.tiles.items():
+                if not isinstance(tile, tuple):
+                    entry.tiles[key] = self._spill(tile)
+
+    def _spill(self, tile):
+        if self.scratch is None:
+            self.scratch = tempfile.TemporaryFile(prefix="imageeditor-history-")
+        self.scratch.seek(self.scratch_size)
+        self.scratch.write(np.ascontiguousarray(tile).tobytes())
+        reference = (self.scratch_size, tile.shape)
+        self.scratch_size += tile.nbytes
+        self.spilled += tile.nbytes
+        self.resident -= tile.nbytes
+        return reference
+
+    def _reset_scratch(self):
+        if self.scratch is not None:
+            self.scratch.close()
+        self.scratch = None
+        self.scratch_size = 0
+        self.spilled = 0
+
+    def _compact(self):
+        if self.scratch is None or self.scratch_size <= 2 * self.spilled:
+            return
+        self.scratch.flush()
+        old = np.memmap(self.scratch, dtype=np.uint8, mode="r", shape=(self.scratch_size,))
+        scratch, self.scratch = self.scratch, None
+        self.scratch_size = 0
+        self.spilled = 0
+        for entry in self.entries:
+            for key, tile in entry.tiles.items():
+                if isinstance(tile, tuple):
+                    offset, shape = tile
+                    data = old[offset:offset + int(np.prod(shape))].reshape(shape)
+                    self.resident += data.nbytes
+                    entry.tiles[key] = self._spill(data)
+        del old
+        scratch.close()
@@ -0,0 +1,48 @@
+import threading
+import numpy as np
+from PIL import Image
+from intermediate_cache import IntermediateCache
+
+
+class ImageBuffer:
+    def __init__(self, max_bytes=512 * 1024 * 1024, scratch_bytes=1024 * 1024 * 1024):
+        self.arrays = IntermediateCache(max_bytes)
+        self.scratch_bytes = scratch_bytes
+        self.pool = {}
+        self.pooled = 0
+        self.lock = threading.Lock()
+
+    def view(self, image):
+        return self.arrays.get(image, "array", (), lambda: np.asarray(image))
+
+    def wrap(self, array, mode=None):
+        image = Image.fromarray(array, mode) if mode else Image.fromarray(array)
+        array.flags.writeable = False
+        self.arrays.put((self.arrays.version(image), "array", ()), array)
+        return image
+
+    def writable(self, image):
+        return self.view(image).copy()
+
+    def scratch(self, name, shape, dtype=np.float32):
+        key = (threading.get_ident(), name)
+        with self.lock:
+            array = self.pool.get(key)
+            if array is not None and array.shape == tuple(shape) and array.dtype == dtype:
+                return array
+            if array is not None:
+                self.pooled -= self.pool.pop(key).nbytes
+            array = np.empty(shape, dtype=dtype)
+            if self.pooled + array.nbytes <= self.scratch_bytes:
+                self.pool[key] = array
+                self.pooled += array.nbytes
+            return array
+
+    def release_scratch(self):
+        with self.lock:
+            self.pool.clear()
+            self.pooled = 0
+
+    def release(self):
+        self.release_scratch()
+        self.arrays.clear()
@@ -1,37 +1,163 @@
-from tkinter import filedialog
+import copy
+import math
+import os
+from collections import OrderedDict
 from PIL import Image
+import numpy as np
 from color_matcher import ColorMatcher
-from noise_effect import NoiseEffect
 from effects import Effects
+from adjustment_engine import AdjustmentEngine, BACKENDS
+from color_lut import ColorLUT
+from proxy import ProxyPyramid
+from history import HistoryStore
+from operation_graph import OperationGraph
+from exporter import StreamingExporter
+from strip_executor import StripExecutor
+from tracer import Tracer, traced
+from intermediate_cache import IntermediateCache
+from scopes import Scopes
 
 class ImageProcessor:
+    TILE_SIZE = 256
+    DRAFT_SIZE = 1600
+    SCOPE_WIDTH = 512
+    STAGE_CACHE_BYTES = 512 * 1024 * 1024
+    STAGE_CACHE_FRAMES = 3
+
     def __init__(self):
         self.original_image = None
+        self.source_size = None
+        self.pending_path = None
+        self.image_version = 0
         self.image = None
         self.cached_image = None
+        self.proxy = None
+        self.cached_preview = None
+        self.cached_preview_key = None
+        self.tile_cache = OrderedDict()
+        self.tile_cache_size = 256
+        self.stage_cache = IntermediateCache(max_bytes=self.STAGE_CACHE_BYTES)
+        self.stage_cache_bytes = None
+        self.stage_cache_shape = None
+        self.stage_cache_enabled = True
+        self.reference_means = None
+        self.reference_means_key = None
+        self.color_lut = None
+        self.color_lut_key = None
         self.adjustments = {
             "width": 0, "height": 0, "brightness": 0, "contrast": 0, "saturation": 0,
             "white_balance": 0, "hue": 0, "temperature": 0, "exposure": 0,
             "shadows": 0, "highlights": 0, "blacks": 0, "whites": 0, "warmth": 0,
             "resize_method": "resize", "crop_side": "center"
         }
-        self.history = []
-        self.history_index = -1
+        self.tracer = Tracer()
+        self.history = HistoryStore()
+        self.operations = OperationGraph(executor=StripExecutor(), tracer=self.tracer)
         self.color_matcher = ColorMatcher()
-        self.noise_effect = NoiseEffect()
         self.effects = Effects()
+        self.buffer = Effects.buffer
+        self.engine = AdjustmentEngine(buffer=self.buffer)
+
+    @property
+    def image(self):
+        return self._image
+
+    @image.setter
+    def image(self, value):
+        self._image = value
+        self.image_version += 1
+
+    def snapshot(self):
+        snapshot = copy.copy(self)
+        snapshot.adjustments = dict(self.adjustments)
+        return snapshot
+
+    def merge_snapshot(self, snapshot):
+        if snapshot.image is self.image:
+            self.proxy = snapshot.proxy
+            self.reference_means = snapshot.reference_means
+            self.reference_means_key = snapshot.reference_means_key
+        self.color_lut = snapshot.color_lut
+        self.color_lut_key = snapshot.color_lut_key
+
+    def commit_image(self, image, label=None):
+        self.image = image
+        self.cached_image = None
+        self.save_to_history(label)
+
+    def commit_operations(self, operations, image):
+        self.operations.commit(operations)
+        self.commit_image(image, operations[-1].name if operations else None)
+
+    def update_operation(self, index, *params, base=None):
+        return self.operations.updated(index, *params, base=base)
+
+    def remove_operation(self, index, base=None):
+        return self.operations.removed(index, base=base)
+
+    @traced("decode", "io")
+    def load_image(self, file_path, draft=False):
+        image = Image.open(file_path)
+        self.source_size = image.size
+        self.pending_path = None
+        if draft and image.format == "JPEG" and max(image.size) > 2 * self.DRAFT_SIZE:
+            ratio = self.DRAFT_SIZE / max(image.size)
+            image.draft("RGB", (max(1, round(image.width * ratio)), max(1, round(image.height * ratio))))
+            if image.size != self.source_size:
+                self.pending_path = file_path
+        self.original_image = image.convert("RGB")
+        self.image = self.original_image
+        self.adjustments["width"], self.adjustments["height"] = self.source_size
+        self.operations.reset(self.original_image)
+        self.history.clear()
+
+    @staticmethod
+    def decode_image(file_path):
+        return Image.open(file_path).convert("RGB")
+
+    def finish_loading(self, file_path, image):
+        if self.pending_path != file_path or image.size != self.source_size:
+            return None
+        operations = tuple(operation.fresh() for operation in self.operations.operations)
+        self.pending_path = None
+        self.original_image = image
+        self.operations.reset(image)
+        self.image = image
+        self.cached_image = None
+        self.history.clear()
+        self.save_to_history()
+        return operations
+
+    def complete_loading(self):
+        if not self.pending_path:
+            return
+        operations = self.finish_loading(self.pending_path, self.decode_image(self.pending_path))
+        if operations:
+            self.commit_operations(operations, self.operations.render(operations))
+
+    @traced("export", "io")
+    def export_image(self, file_path, operations=()):
+        self.complete_loading()
+        streaming = StreamingExporter.supports(file_path)
+        if operations and not (streaming and StreamingExporter.can_stream(operations, self)):
+            self.image = self.operations.render(operations)
+            operations = ()
+        try:
+            if streaming:
+                StreamingExporter(self, operations).export(file_path)
+            else:
+                self.get_processed_image().save(file_path)
+        finally:
+            self.buffer.release_scratch()
 
     def open_image(self):
+        from tkinter import filedialog
         file_path = filedialog.askopenfilename(
             filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp *.gif *.tiff")]
         )
         if file_path:
             try:
-                self.original_image = Image.open(file_path).convert("RGB")
-                self.image = self.original_image.copy()
-                self.adjustments["width"], self.adjustments["height"] = self.original_image.size
-                self.history = []
-                self.history_index = -1
+                self.load_image(file_path, draft=True)
                 self.save_to_history()
                 return True
             except Exception as e:
@@ -41,21 +167,76 @@ class ImageProcessor:
     def save_image(self):
         if not self.image:
             return
+        from tkinter import filedialog
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
             filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg"), ("All files", "*.*")]
         )
         if file_path:
             try:
-                processed_image = self.get_processed_image()
-                processed_image.save(file_path)
+                self.export_image(file_path)
             except Exception as e:
                 print(f"Ошибка при сохранении изображения: {e}")
 
+    def export_lut(self):
+        if not self.image:
+            return
+        from tkinter import filedialog
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".cube",
+            filetypes=[("Cube LUT", "*.cube"), ("All files", "*.*")]
+        )
+        if file_path:
+            try:
+                self.complete_loading()
+                self.get_color_lut(means=self.get_reference_means()).write_cube(file_path)
+            except Exception as e:
+                print(f"Ошибка при экспорте LUT: {e}")
+
+    def get_color_lut(self, array=None, means=None):
+        if means is None and self.engine.needs_means(self.adjustments):
+            means = self.engine.channel_means(array)
+        key = (tuple(self.engine.active(self.adjustments)),
+               None if means is None else tuple(np.round(means, 2)))
+        if self.color_lut is None or self.color_lut_key != key:
+            self.color_lut = ColorLUT.build(self.engine, self.adjustments, means)
+            self.color_lut_key = key
+        return self.color_lut
+
+    @traced("adjustments")
+    def apply_adjustments(self, img, means=None):
+        if not self.engine.active(self.adjustments):
+            return img
+        array = self.buffer.view(img)
+        lut = self.get_color_lut(array, means)
+        if lut.separable:
+            return self.buffer.wrap(lut.apply_array(array))
+        return self.engine.apply(img, self.adjustments, means)
+
     def update_adjustment(self, key, value):
         self.adjustments[key] = value
         self.cached_image = None
 
+    def set_adjustment_order(self, order):
+        order = tuple(order) if order else AdjustmentEngine.ORDER
+        if sorted(order) != sorted(AdjustmentEngine.ORDER):
+            raise ValueError(f"Порядок настроек должен содержать все ключи: {', '.join(AdjustmentEngine.ORDER)}")
+        self.engine = type(self.engine)(order, self.buffer)
+        self.color_lut = None
+        self.color_lut_key = None
+        self.cached_image = None
+
+    def set_adjustment_backend(self, name):
+        name = name or AdjustmentEngine.NAME
+        if name not in BACKENDS:
+            raise ValueError(f"Неизвестный движок настроек: {name}, доступны: {', '.join(BACKENDS)}")
+        self.engine = BACKENDS[name](self.engine.order, self.buffer)
+        self.cached_image = None
+
+    def geometry_key(self):
+        return (self.image_version, self.adjustments.get("resize_method"), self.adjustments.get("width"),
+                self.adjustments.get("height"), self.adjustments.get("crop_side"))
+
     def crop_image(self, img, target_width, target_height, crop_side):
         orig_width, orig_height = img.size
 
@@ -108,180 +289,295 @@ class ImageProcessor:
             new_img.paste(cropped_img, (paste_x, paste_y))
             return new_img
 
-    def get_processed_image(self, fast_mode=False):
+    def get_output_size(self):
         if not self.image:
-            return None
-
-        if self.cached_image and fast_mode:
-            return self.cached_image
-
-        img = self.image.copy()
+            return 0, 0
+        target_width = self.adjustments.get("width", self.image.width)
+        target_height = self.adjustments.get("height", self.image.height)
+        if target_width > 0 and target_height > 0:
+            return int(target_width), int(target_height)
+        return self.image.size
 
+    @traced("geometry")
+    def apply_geometry(self, img, scale=1.0, level_scale=1.0, resample=Image.Resampling.LANCZOS):
         method = self.adjustments.get("resize_method", "resize")
         target_width = self.adjustments.get("width", img.width)
         target_height = self.adjustments.get("height", img.height)
         crop_side = self.adjustments.get("crop_side", "center")
 
         if target_width > 0 and target_height > 0:
+            out_size = (max(1, round(target_width * scale)), max(1, round(target_height * scale)))
             if method == "resize":
-                if target_width != img.width or target_height != img.height:
-                    img = self.resize_image(img, target_width, target_height)
+                if out_size != img.size:
+                    img = img.resize(out_size, resample)
             elif method == "crop":
-                img = self.crop_image(img, target_width, target_height, crop_side)
-
-        if self.adjustments["brightness"] != 0:
-            img = self.effects.adjust_brightness(img, self.adjustments["brightness"])
-
-        if self.adjustments["contrast"] != 0:
-            img = self.effects.adjust_contrast(img, self.adjustments["contrast"])
-
-        if self.adjustments["saturation"] != 0:
-            img = self.effects.adjust_saturation(img, self.adjustments["saturation"])
-
-        if self.adjustments["exposure"] != 0:
-            img = self.effects.adjust_exposure(img, self.adjustments["exposure"])
-
-        if self.adjustments["shadows"] != 0:
-            img = self.effects.adjust_shadows(img, self.adjustments["shadows"])
+                img = self.crop_image(img, max(1, round(target_width * level_scale)),
+                                      max(1, round(target_height * level_scale)), crop_side)
+                if img.size != out_size:
+                    img = img.resize(out_size, resample)
+        return img
 
-        if self.adjustments["highlights"] != 0:
-            img = self.effects.adjust_highlights(img, self.adjustments["highlights"])
+    def get_proxy(self):
+        if self.proxy is None or self.proxy.source is not self.image:
+            with self.tracer.span("proxy"):
+                self.proxy = ProxyPyramid(self.image)
+            self.tile_cache.clear()
+        return self.proxy
 
-        if self.adjustments["blacks"] != 0:
-            img = self.effects.adjust_blacks(img, self.adjustments["blacks"])
+    def render_key(self):
+        return self.image_version, tuple(sorted(self.adjustments.items())), self.engine.order, self.engine.NAME
 
-        if self.adjustments["whites"] != 0:
-            img = self.effects.adjust_whites(img, self.adjustments["whites"])
+    @staticmethod
+    def preview_scale(zoom):
+        return min(1.0, 2 ** (math.ceil(math.log2(zoom) * 2) / 2)) if zoom > 0 else 1.0
 
-        if self.adjustments["hue"] != 0:
-            img = self.effects.adjust_hue(img, self.adjustments["hue"])
+    def get_geometry_transform(self):
+        width, height = self.image.size
+        out_width, out_height = self.get_output_size()
+        if self.adjustments.get("resize_method", "resize") != "crop":
+            return width / out_width, height / out_height, 0, 0, (0, 0, out_width, out_height)
 
-        if self.adjustments["temperature"] != 0:
-            img = self.effects.adjust_temperature(img, self.adjustments["temperature"])
+        crop_side = self.adjustments.get("crop_side", "center")
+        crop_width, crop_height = min(out_width, width), min(out_height, height)
+        left = (width - crop_width) // 2
+        top = (height - crop_height) // 2
+        if crop_side == "top":
+            top = 0
+        elif crop_side == "bottom":
+            top = height - crop_height
+        elif crop_side == "left":
+            left = 0
+        elif crop_side == "right":
+            left = width - crop_width
+        paste_x = (out_width - crop_width) // 2
+        paste_y = (out_height - crop_height) // 2
+        return 1, 1, left - paste_x, top - paste_y, (paste_x, paste_y, paste_x + crop_width, paste_y + crop_height)
+
+    def get_reference_means(self):
+        if not self.engine.needs_means(self.adjustments):
+            return None
+        key = self.geometry_key()
+        if self.reference_means_key != key:
+            self.reference_means = self.engine.channel_means(np.asarray(self.get_reference_image()))
+            self.reference_means_key = key
+        return self.reference_means
+
+    def get_reference_image(self):
+        level = self.get_proxy().levels[-1]
+        level_scale = level.width / self.image.width
+        out_width = self.get_output_size()[0]
+        scale = level_scale * (self.image.width / out_width
+                               if self.adjustments.get("resize_method", "resize") == "resize" else 1)
+        return self.apply_geometry(level, scale, level_scale, Image.Resampling.BILINEAR)
+
+    def get_scaled_size(self, scale):
+        out_width, out_height = self.get_output_size()
+        return max(1, round(out_width * scale)), max(1, round(out_height * scale))
+
+    @traced("tile_geometry")
+    def render_tile_geometry(self, tile_x, tile_y, scale):
+        out_width, out_height = self.get_output_size()
+        full_width, full_height = self.get_scaled_size(scale)
+        ratio_x, ratio_y = out_width / full_width, out_height / full_height
+        left, top = tile_x * self.TILE_SIZE, tile_y * self.TILE_SIZE
+        right = min(left + self.TILE_SIZE, full_width)
+        bottom = min(top + self.TILE_SIZE, full_height)
+
+        scale_x, scale_y, offset_x, offset_y, valid = self.get_geometry_transform()
+        valid_left = max(left, math.ceil(valid[0] / ratio_x))
+        valid_top = max(top, math.ceil(valid[1] / ratio_y))
+        valid_right = min(right, math.floor(valid[2] / ratio_x))
+        valid_bottom = min(bottom, math.floor(valid[3] / ratio_y))
+
+        tile = Image.new("RGB", (right - left, bottom - top), (0, 0, 0))
+        if valid_right > valid_left and valid_bottom > valid_top:
+            level, level_scale = self.get_proxy().level_for(min(1.0, 1 / (ratio_x * scale_x)))
+            source_box = (
+                (valid_left * ratio_x * scale_x + offset_x) * level_scale,
+                (valid_top * ratio_y * scale_y + offset_y) * level_scale,
+                (valid_right * ratio_x * scale_x + offset_x) * level_scale,
+                (valid_bottom * ratio_y * scale_y + offset_y) * level_scale
+            )
+            size = (valid_right - valid_left, valid_bottom - valid_top)
+            if all(float(v).is_integer() for v in source_box) and \
+                    (source_box[2] - source_box[0], source_box[3] - source_box[1]) == size:
+                region = level.crop(tuple(int(v) for v in source_box))
+            else:
+                resample = Image.Resampling.LANCZOS if scale >= 1 else Image.Resampling.BILINEAR
+                region = level.resize(size, resample, box=source_box)
+            tile.paste(region, (valid_left - left, valid_top - top))
+
+        return tile
+
+    @traced("render_tile")
+    def render_tile(self, tile_x, tile_y, scale):
+        key = (self.render_key(), scale, tile_x, tile_y)
+        tile = self.tile_cache.get(key)
+        if tile is not None:
+            self.tile_cache.move_to_end(key)
+            self.tracer.count("tile_cache_hit")
+            return tile
+        self.tracer.count("tile_cache_miss")
+        base = self.stage_cache.lookup(("tile", scale, tile_x, tile_y) + self.geometry_key(),
+                                       lambda: np.asarray(self.render_tile_geometry(tile_x, tile_y, scale)))
+        tile = self.apply_adjustments(self.buffer.wrap(base), self.get_reference_means())
+
+        self.tile_cache[key] = tile
+        while len(self.tile_cache) > self.tile_cache_size:
+            self.tile_cache.popitem(last=False)
+        return tile
+
+    def render_region(self, box, scale):
+        if not self.image:
+            return None
+        left, top, right, bottom = box
+        full_width, full_height = self.get_scaled_size(scale)
+        region = Image.new("RGB", (right - left, bottom - top), (0, 0, 0))
+        for tile_y in range(max(0, top) // self.TILE_SIZE, (min(bottom, full_height) - 1) // self.TILE_SIZE + 1):
+            for tile_x in range(max(0, left) // self.TILE_SIZE, (min(right, full_width) - 1) // self.TILE_SIZE + 1):
+                tile = self.render_tile(tile_x, tile_y, scale)
+                region.paste(tile, (tile_x * self.TILE_SIZE - left, tile_y * self.TILE_SIZE - top))
+        return region
+
+    @traced("preview")
+    def get_preview_image(self, scale):
+        if not self.image:
+            return None, 1.0
+        scale = self.preview_scale(scale)
+        if scale >= 1:
+            return self.get_processed_image(fast_mode=True), 1.0
+
+        key = (self.render_key(), scale)
+        if self.cached_preview is not None and self.cached_preview_key == key:
+            return self.cached_preview, scale
+
+        needed = scale
+        if self.adjustments.get("resize_method", "resize") == "resize":
+            needed = scale * self.get_output_size()[0] / self.image.width
+        level, level_scale = self.get_proxy().level_for(min(1.0, needed))
+        img = self.apply_geometry(level, scale, level_scale, Image.Resampling.BILINEAR)
+        img = self.apply_adjustments(img, self.get_reference_means())
+        self.cached_preview = img
+        self.cached_preview_key = key
+        return img, scale
+
+    @traced("processed")
+    def get_processed_image(self, fast_mode=False):
+        if not self.image:
+            return None
 
-        if self.adjustments["white_balance"] != 0:
-            img = self.effects.adjust_white_balance(img, self.adjustments["white_balance"])
+        if self.cached_image and fast_mode:
+            return self.cached_image
 
-        if self.adjustments["warmth"] != 0:
-            img = self.effects.adjust_warmth(img, self.adjustments["warmth"])
+        key = ("geometry",) + self.geometry_key()
+        identity = self.get_output_size() == self.image.size
+        if identity and not self.engine.active(self.adjustments):
+            self.cached_image = self.image if fast_mode else None
+            return self.image
+        if identity:
+            base = self.buffer.view(self.image)
+        else:
+            base = self.stage_cache.lookup(key, lambda: np.asarray(self.apply_geometry(self.image)))
+        if not self.engine.active(self.adjustments):
+            img = self.buffer.wrap(base)
+        else:
+            means = self.engine.channel_means(base) if self.engine.needs_means(self.adjustments) else None
+            lut = self.get_color_lut(base, means)
+            if lut.separable:
+                img = self.buffer.wrap(lut.apply_array(base))
+            else:
+                program = self.engine.compile(self.adjustments, means)
+                self.fit_stage_cache(base.shape)
+                with self.tracer.span("adjustments"):
+                    staged = self.engine.run_staged(base, program, self.stage_cache, (key, self.engine.NAME))
+                    img = self.buffer.wrap(staged)
 
         self.cached_image = img if fast_mode else None
         return img
 
-    def save_to_history(self):
+    @staticmethod
+    def physical_memory():
+        try:
+            return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import psutil
+            return psutil.virtual_memory().total
+        except ImportError:
+            return None
+
+    def fit_stage_cache(self, shape):
+        stage = math.prod(shape) * np.dtype(np.float32).itemsize
+        budget = self.stage_cache_bytes
+        if budget is None:
+            budget = max(self.STAGE_CACHE_BYTES, self.STAGE_CACHE_FRAMES * stage)
+            total = self.physical_memory()
+            if total:
+                budget = min(budget, total // 4)
+        self.stage_cache.max_bytes = budget
+        if shape != self.stage_cache_shape:
+            self.stage_cache_shape = shape
+            if stage > budget:
+                self.tracer.count("stage_cache_disabled")
+        self.stage_cache_enabled = stage <= budget
+
+    @traced("scopes")
+    def get_scopes(self):
+        if not self.image:
+            return None
+        img, _ = self.get_preview_image(min(1.0, self.SCOPE_WIDTH / self.get_output_size()[0]))
+        return Scopes.compute(self.buffer.view(img))
+
+    def auto_levels(self, clip=0.005, iterations=4):
+        array = np.asarray(self.get_reference_image())
+        means = self.get_reference_means()
+        adjustments = dict(self.adjustments, exposure=max(-0.9, self.adjustments["exposure"]))
+        for _ in range(iterations):
+            adjusted = self.engine.apply_array(array, adjustments, means)
+            black, white = Scopes.levels(Scopes.histogram(adjusted)[3], clip)
+            offset = adjustments["blacks"] * 50
+            blacks = min(1.0, max(-1.0, 255 * (offset - black) / (white - black) / 50))
+            gain = (255 - blacks * 50) / max(white - offset, 1)
+            exposure = min(1.0, max(-0.9, (1 + adjustments["exposure"]) * gain - 1))
+            gain = (1 + exposure) / (1 + adjustments["exposure"])
+            blacks = min(1.0, max(-1.0, gain * (offset - black) / 50))
+            if abs(exposure - adjustments["exposure"]) < 1e-3 and abs(blacks - adjustments["blacks"]) < 1e-3:
+                break
+            adjustments["exposure"], adjustments["blacks"] = exposure, blacks
+        return {"exposure": adjustments["exposure"], "blacks": adjustments["blacks"]}
+
+    def save_to_history(self, label=None):
         if self.image:
-            self.history = self.history[:self.history_index + 1]
-            self.history.append(self.image.copy())
-            self.history_index += 1
-            if len(self.history) > 10:
-                self.history.pop(0)
-                self.history_index -= 1
+            self.history.push(self.image, label, self.operations.operations)
 
     def undo(self):
-        if self.history_index > 0:
-            self.history_index -= 1
-            self.image = self.history[self.history_index].copy()
-            self.cached_image = None
-            return True
-        return False
-
-    def match_colors(self):
-        self.image = self.color_matcher.match_colors(self.image if self.image else self.original_image)
+        image = self.history.undo()
+        if image is None:
+            return False
+        self.operations.commit(self.history.state)
+        self.image = image
         self.cached_image = None
-        self.save_to_history()
-
-    def apply_noise(self, intensity, noise_type):
-        self.image = self.noise_effect.apply_noise(
-            self.image if self.image else self.original_image,
-            intensity,
-            noise_type
-        )
+        return True
+
+    def redo(self):
+        image = self.history.redo()
+        if image is None:
+            return False
+        self.operations.commit(self.history.state)
+        self.image = image
         self.cached_image = None
-        self.save_to_history()
+        return True
+
+    def match_colors(self):
+        image = self.color_matcher.match_colors(self.image if self.image else self.original_image)
+        if image is None:
+            return False
+        operations = self.operations.appended(self.color_matcher.transfer, self.color_matcher.reference_image)
+        operations[-1].output = image
+        self.commit_operations(operations, image)
+        return True
 
     def resize_image(self, img, width, height):
         resized_img = img.resize((int(width), int(height)), Image.Resampling.LANCZOS)
         return resized_img
-
-    def apply_pixelation(self, pixel_size):
-        self.image = self.effects.apply_pixelation(
-            self.image if self.image else self.original_image,
-            pixel_size
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_vignette(self, intensity):
-        self.image = self.effects.apply_vignette(
-            self.image if self.image else self.original_image,
-            intensity
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_glow(self, intensity, radius):
-        self.image = self.effects.apply_glow(
-            self.image if self.image else self.original_image,
-            radius,
-            intensity
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_invert(self):
-        self.image = self.effects.apply_invert(
-            self.image if self.image else self.original_image,
-            1.0
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_emboss(self, intensity):
-        self.image = self.effects.apply_emboss(
-            self.image if self.image else self.original_image,
-            intensity
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_blur(self, radius):
-        self.image = self.effects.apply_blur(
-            self.image if self.image else self.original_image,
-            radius,
-            "gaussian"
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_oil_painting(self, radius, levels):
-        self.image = self.effects.apply_oil_painting(
-            self.image if self.image else self.original_image,
-            radius,
-            levels
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_sepia(self, intensity):
-        self.image = self.effects.apply_sepia(
-            self.image if self.image else self.original_image,
-            intensity
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_grayscale(self, intensity):
-        self.image = self.effects.apply_grayscale(
-            self.image if self.image else self.original_image,
-            intensity
-        )
-        self.cached_image = None
-        self.save_to_history()
-
-    def apply_posterize(self, bits):
-        self.image = self.effects.apply_posterize(
-            self.image if self.image else self.original_image,
-            bits
-        )
-        self.cached_image = None
-        self.save_to_history()
\ No newline at end of file
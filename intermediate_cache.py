@@ -0,0 +1,89 @@
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class IntermediateCache:
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.versions = {}
+        self.counter = itertools.count(1)
+        self.lock = threading.RLock()
+
+    def version(self, image):
+        with self.lock:
+            ref, version = self.versions.get(id(image), (None, None))
+            if ref is None or ref() is not image:
+                version = next(self.counter)
+                key = id(image)
+                ref = weakref.ref(image, lambda _, key=key, version=version: self._forget(key, version))
+                self.versions[key] = (ref, version)
+            return version
+
+    def _forget(self, key, version):
+        with self.lock:
+            if self.versions.get(key, (None, None))[1] == version:
+                del self.versions[key]
+            for entry in [entry for entry in self.entries if entry[0] == version]:
+                self.nbytes -= self.entries.pop(entry).nbytes
+
+    def get(self, image, operation, params, compute):
+        return self.lookup((self.version(image), operation, tuple(params)), compute)
+
+    def lookup(self, key, compute):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = compute()
+        value.flags.writeable = False
+        self.put(key, value)
+        return value
+
+    def peek(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            if value.nbytes > self.max_bytes:
+                return
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self.entries[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self.entries),
+            "bytes": self.nbytes
+        }
@@ -0,0 +1,77 @@
+from contextlib import nullcontext
+
+
+class Operation:
+    def __init__(self, func, params):
+        self.func = func
+        self.params = tuple(params)
+        self.output = None
+
+    @property
+    def name(self):
+        return self.func.__name__
+
+    def fresh(self):
+        return Operation(self.func, self.params)
+
+
+class OperationGraph:
+    def __init__(self, cache_budget=512 * 1024 * 1024, executor=None, tracer=None):
+        self.cache_budget = cache_budget
+        self.executor = executor
+        self.tracer = tracer
+        self.source = None
+        self.operations = ()
+
+    def reset(self, source):
+        self.release(self.operations)
+        self.source = source
+        self.operations = ()
+
+    def appended(self, func, *params, base=None):
+        return (self.operations if base is None else base) + (Operation(func, params),)
+
+    def updated(self, index, *params, base=None):
+        operations = self.operations if base is None else base
+        operation = Operation(operations[index].func, params)
+        return operations[:index] + (operation,) + tuple(op.fresh() for op in operations[index + 1:])
+
+    def removed(self, index, base=None):
+        operations = self.operations if base is None else base
+        return operations[:index] + tuple(op.fresh() for op in operations[index + 1:])
+
+    def render(self, operations, cancelled=None):
+        start = len(operations) - 1
+        while start >= 0 and operations[start].output is None:
+            start -= 1
+        image = operations[start].output if start >= 0 else self.source
+        for operation in operations[start + 1:]:
+            if cancelled and cancelled():
+                return None
+            with self.tracer.span(operation.name, "effect") if self.tracer else nullcontext():
+                if self.executor is not None:
+                    operation.output = self.executor.run(operation.func, image, *operation.params)
+                else:
+                    operation.output = operation.func(image, *operation.params)
+            image = operation.output
+        return image
+
+    def commit(self, operations):
+        kept = set(map(id, operations))
+        self.release(op for op in self.operations if id(op) not in kept)
+        self.operations = tuple(operations)
+        self.trim()
+
+    @staticmethod
+    def release(operations):
+        for operation in operations:
+            operation.output = None
+
+    def trim(self):
+        cached = [op for op in self.operations[:-1] if op.output is not None]
+        total = sum(op.output.width * op.output.height * len(op.output.getbands()) for op in cached)
+        for operation in cached:
+            if total <= self.cache_budget:
+                break
+            total -= operation.output.width * operation.output.height * len(operation.output.getbands())
+            operation.output = None
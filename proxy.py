@@ -0,0 +1,14 @@
+class ProxyPyramid:
+    def __init__(self, image, min_size=256):
+        self.source = image
+        self.levels = [image]
+        while min(self.levels[-1].size) >= min_size * 2:
+            self.levels.append(self.levels[-1].reduce(2))
+
+    def level_for(self, scale):
+        chosen = self.levels[0]
+        for level in self.levels[1:]:
+            if level.width / self.source.width < scale:
+                break
+            chosen = level
+        return chosen, chosen.width / self.source.width
@@ -0,0 +1,104 @@
+import itertools
+import queue
+import threading
+from collections import OrderedDict
+
+
+class RenderScheduler:
+    def __init__(self, root, poll_interval=15):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.pending = OrderedDict()
+        self.generations = {}
+        self.active = None
+        self.spawned = 0
+        self.sequence = itertools.count()
+        self.results = queue.Queue()
+        self.condition = threading.Condition()
+        self.polling = False
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+
+    def submit(self, channel, func, callback=None, error_callback=None, queued=False):
+        with self.condition:
+            if queued:
+                generation = self.generations.setdefault(channel, 0)
+                key = (channel, next(self.sequence))
+            else:
+                generation = self.generations.get(channel, 0) + 1
+                self.generations[channel] = generation
+                self.pending.pop(channel, None)
+                key = channel
+            self.pending[key] = (channel, (generation, func, callback, error_callback))
+            self.condition.notify()
+        self._schedule_poll()
+        return generation
+
+    def spawn(self, channel, func, callback=None, error_callback=None):
+        with self.condition:
+            generation = self.generations.get(channel, 0) + 1
+            self.generations[channel] = generation
+            self.spawned += 1
+        job = (generation, func, callback, error_callback)
+        threading.Thread(target=self._run, args=(channel, job, True), daemon=True).start()
+        self._schedule_poll()
+        return generation
+
+    def cancel(self, channel):
+        with self.condition:
+            if channel in self.generations:
+                self.generations[channel] += 1
+            for key in [key for key, (job_channel, _) in self.pending.items() if job_channel == channel]:
+                del self.pending[key]
+
+    def is_current(self, channel, generation):
+        return self.generations.get(channel) == generation
+
+    def is_idle(self):
+        with self.condition:
+            return not self.pending and self.active is None and not self.spawned and self.results.empty()
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                channel, job = self.pending.popitem(last=False)[1]
+                self.active = channel
+            self._run(channel, job)
+
+    def _run(self, channel, job, spawned=False):
+        generation, func, callback, error_callback = job
+        result, error = None, None
+        try:
+            result = func(lambda: not self.is_current(channel, generation))
+        except Exception as e:
+            error = e
+        self.results.put((channel, generation, result, error, callback, error_callback))
+        with self.condition:
+            if spawned:
+                self.spawned -= 1
+            else:
+                self.active = None
+
+    def _schedule_poll(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self.polling = False
+        while True:
+            try:
+                channel, generation, result, error, callback, error_callback = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if not self.is_current(channel, generation):
+                continue
+            if error is not None:
+                if error_callback:
+                    error_callback(error)
+            elif callback:
+                callback(result)
+        if not self.is_idle():
+            self._schedule_poll()
@@ -0,0 +1,83 @@
+import time
+import numpy as np
+from PIL import Image, ImageTk
+
+
+class ScopeView:
+    WIDTH = 256
+    HEIGHT = 96
+    MARGIN = 12
+    INTERVAL = 1 / 30
+    COLORS = ("#ff5050", "#50ff50", "#5090ff", "#e0e0e0")
+
+    def __init__(self, canvas, processor, scheduler, on_error=None):
+        self.canvas = canvas
+        self.processor = processor
+        self.scheduler = scheduler
+        self.on_error = on_error
+        self.visible = False
+        self.key = None
+        self.scopes = None
+        self.photo = None
+        self.last_request = 0.0
+        self.pending = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible:
+            self.key = None
+            self.request()
+        else:
+            self.scheduler.cancel("scopes")
+            self.canvas.delete("scopes")
+
+    def request(self):
+        if not self.visible or not self.processor.image:
+            return
+        key = self.processor.render_key()
+        if key == self.key:
+            self.canvas.tag_raise("scopes")
+            return
+        delay = self.INTERVAL - (time.perf_counter() - self.last_request)
+        if delay > 0:
+            if self.pending is None:
+                self.pending = self.canvas.after(int(delay * 1000) + 1, self.flush)
+            return
+        self.last_request = time.perf_counter()
+        self.key = key
+        snapshot = self.processor.snapshot()
+
+        def done(scopes):
+            self.processor.merge_snapshot(snapshot)
+            self.scopes = scopes
+            self.draw()
+
+        self.scheduler.submit("scopes", lambda cancelled: snapshot.get_scopes(), done, self.on_error)
+
+    def flush(self):
+        self.pending = None
+        self.request()
+
+    def draw(self):
+        self.canvas.delete("scopes")
+        if not self.visible or self.scopes is None:
+            return
+        histogram, waveform = self.scopes
+        left = self.MARGIN
+        bottom = (self.canvas.winfo_height() or 600) - self.MARGIN
+        top = bottom - 2 * self.HEIGHT - self.MARGIN
+        self.canvas.create_rectangle(left - 4, top - 4, left + self.WIDTH + 4, bottom + 4,
+                                     fill="#101010", outline="", tags="scopes")
+
+        levels = np.log1p(waveform.T[::-1].astype(np.float32))
+        levels *= 255 / max(float(levels.max()), 1.0)
+        image = Image.fromarray(levels.astype(np.uint8)).resize((self.WIDTH, self.HEIGHT), Image.Resampling.BILINEAR)
+        self.photo = ImageTk.PhotoImage(image)
+        self.canvas.create_image(left, top, image=self.photo, anchor="nw", tags="scopes")
+
+        peak = max(float(histogram[:, 1:-1].max()), 1.0)
+        x = left + np.arange(256) * (self.WIDTH - 1) / 255
+        for counts, color in zip(histogram, self.COLORS):
+            y = bottom - np.minimum(counts / peak, 1.0) * self.HEIGHT
+            self.canvas.create_line(*np.column_stack([x, y]).ravel(), fill=color, tags="scopes")
+        self.canvas.tag_raise("scopes")
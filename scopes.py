@@ -0,0 +1,57 @@
+import math
+import numpy as np
+import cv2
+
+
+class Scopes:
+    WAVEFORM_COLUMNS = 256
+    SAMPLES = 1 << 16
+    columns_cache = {}
+
+    @staticmethod
+    def luma(array):
+        return cv2.cvtColor(np.ascontiguousarray(array[..., :3]), cv2.COLOR_RGB2GRAY)
+
+    @staticmethod
+    def channel_histogram(array):
+        return np.stack([np.bincount(array[..., channel].ravel(), minlength=256) for channel in range(3)])
+
+    @classmethod
+    def histogram(cls, array, luma=None):
+        if luma is None:
+            luma = cls.luma(array)
+        return np.vstack([cls.channel_histogram(array), np.bincount(luma.ravel(), minlength=256)])
+
+    @classmethod
+    def waveform(cls, luma, columns=None):
+        width = luma.shape[1]
+        columns = min(columns or cls.WAVEFORM_COLUMNS, width)
+        offsets = cls.columns_cache.get((width, columns))
+        if offsets is None:
+            offsets = (np.arange(width, dtype=np.int32) * columns // width) * 256
+            cls.columns_cache[(width, columns)] = offsets
+        counts = np.bincount((luma + offsets).ravel(), minlength=columns * 256)
+        return counts.reshape(columns, 256)
+
+    @classmethod
+    def compute(cls, array, samples=None):
+        step = max(1, math.ceil(math.sqrt(array.shape[0] * array.shape[1] / (samples or cls.SAMPLES))))
+        array = array[::step, ::step]
+        luma = cls.luma(array)
+        return cls.histogram(array, luma), cls.waveform(luma)
+
+    @staticmethod
+    def statistics(histogram):
+        values = np.arange(histogram.shape[-1], dtype=np.float64)
+        total = np.maximum(histogram.sum(axis=-1), 1)
+        mean = histogram @ values / total
+        variance = histogram @ (values * values) / total - mean * mean
+        return mean, np.sqrt(np.maximum(variance, 0))
+
+    @staticmethod
+    def levels(histogram, clip=0.005):
+        cumulative = np.cumsum(histogram)
+        total = cumulative[-1]
+        black = int(np.searchsorted(cumulative, total * clip, side="right"))
+        white = int(np.searchsorted(cumulative, total * (1 - clip)))
+        return min(black, 254), max(white, min(black, 254) + 1)
@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from effects import Effects
+
+
+class StripExecutor:
+    MIN_COST = 15.0
+    MIN_ROWS = 64
+
+    def __init__(self, workers=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.pool = None
+
+    def strip_bounds(self, height, halo):
+        count = min(self.workers, height // max(self.MIN_ROWS, 2 * halo))
+        return [round(i * height / count) for i in range(count + 1)] if count > 1 else None
+
+    def run(self, func, image, *params):
+        spec = Effects.spec(func)
+        halo = spec.halo_for(params) if spec else None
+        if halo is None or spec.cached or spec.estimate(image.width * image.height / 1e6) < self.MIN_COST:
+            return func(image, *params)
+        bounds = self.strip_bounds(image.height, halo)
+        if bounds is None:
+            return func(image, *params)
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="strip")
+
+        def strip(top, bottom):
+            start, end = max(0, top - halo), min(image.height, bottom + halo)
+            result = func(image.crop((0, start, image.width, end)), *params)
+            return result.crop((0, top - start, image.width, bottom - start))
+
+        futures = [self.pool.submit(strip, top, bottom) for top, bottom in zip(bounds, bounds[1:])]
+        strips = [future.result() for future in futures]
+        output = Image.new(strips[0].mode, image.size)
+        for top, result in zip(bounds, strips):
+            output.paste(result, (0, top))
+        return output
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
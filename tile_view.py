@@ -0,0 +1,138 @@
+import math
+from collections import OrderedDict
+from PIL import Image, ImageTk
+from tracer import traced
+
+
+class TileView:
+    TILE_SIZE = 256
+
+    def __init__(self, canvas, processor, scheduler, on_error=None, cache_size=192):
+        self.canvas = canvas
+        self.processor = processor
+        self.scheduler = scheduler
+        self.tracer = processor.tracer
+        self.on_error = on_error
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.visible = {}
+        self.last_draw = None
+
+    @staticmethod
+    def quantize_zoom(zoom):
+        return 2 ** (round(math.log2(zoom) * 4) / 4)
+
+    def clear(self):
+        self.scheduler.cancel("view")
+        for item, _, _ in self.visible.values():
+            self.canvas.delete(item)
+        self.visible.clear()
+
+    def render_tile(self, processor, tile_x, tile_y, display_zoom, scale, resample):
+        factor = display_zoom / scale
+        out_width, out_height = processor.get_output_size()
+        scaled_width, scaled_height = processor.get_scaled_size(scale)
+        left, top = tile_x * self.TILE_SIZE, tile_y * self.TILE_SIZE
+        right = min(left + self.TILE_SIZE, int(out_width * display_zoom))
+        bottom = min(top + self.TILE_SIZE, int(out_height * display_zoom))
+
+        box = (left / factor, top / factor, min(right / factor, scaled_width), min(bottom / factor, scaled_height))
+        int_box = (math.floor(box[0]), math.floor(box[1]), max(math.floor(box[0]) + 1, math.ceil(box[2])),
+                   max(math.floor(box[1]) + 1, math.ceil(box[3])))
+        region = processor.render_region(int_box, scale)
+        size = (right - left, bottom - top)
+        if region.size != size or int_box != box:
+            region = region.resize(size, resample, box=(box[0] - int_box[0], box[1] - int_box[1],
+                                                        box[2] - int_box[0], box[3] - int_box[1]))
+        return region
+
+    def get_tile(self, key):
+        photo = self.cache.get(key)
+        if photo is not None:
+            self.cache.move_to_end(key)
+        self.tracer.count("photo_cache_hit" if photo is not None else "photo_cache_miss")
+        return photo
+
+    def store_tile(self, key, photo):
+        self.cache[key] = photo
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def request_tiles(self, missing, display_zoom, scale, resample):
+        snapshot = self.processor.snapshot()
+
+        def render(cancelled):
+            tiles = {}
+            with self.tracer.span("view_tiles"):
+                for key, tile_x, tile_y in missing:
+                    if cancelled():
+                        break
+                    tiles[key] = self.render_tile(snapshot, tile_x, tile_y, display_zoom, scale, resample)
+            return tiles
+
+        def done(tiles):
+            self.processor.merge_snapshot(snapshot)
+            with self.tracer.span("photoimage", "ui"):
+                for key, tile in tiles.items():
+                    self.store_tile(key, ImageTk.PhotoImage(tile))
+            if self.last_draw:
+                self.draw(*self.last_draw)
+
+        self.scheduler.submit("view", render, done, self.on_error)
+
+    @traced("canvas", "ui")
+    def draw(self, zoom, offset_x, offset_y, canvas_width, canvas_height, fast_mode=False, animating=False):
+        self.last_draw = (zoom, offset_x, offset_y, canvas_width, canvas_height, fast_mode, animating)
+        display_zoom = self.quantize_zoom(zoom) if animating else zoom
+        scale = self.processor.preview_scale(display_zoom)
+        if fast_mode or display_zoom <= 1:
+            resample = Image.Resampling.BILINEAR
+        else:
+            resample = Image.Resampling.LANCZOS
+
+        out_width, out_height = self.processor.get_output_size()
+        full_width, full_height = int(out_width * display_zoom), int(out_height * display_zoom)
+        origin_x = int(canvas_width / 2 + offset_x - full_width / 2)
+        origin_y = int(canvas_height / 2 + offset_y - full_height / 2)
+
+        first_x = max(0, -origin_x) // self.TILE_SIZE
+        first_y = max(0, -origin_y) // self.TILE_SIZE
+        last_x = (min(full_width, canvas_width - origin_x) - 1) // self.TILE_SIZE
+        last_y = (min(full_height, canvas_height - origin_y) - 1) // self.TILE_SIZE
+
+        render_key = (self.processor.render_key(), display_zoom, resample)
+        wanted = set()
+        missing = []
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                wanted.add((tile_x, tile_y))
+                key = (render_key, tile_x, tile_y)
+                x = origin_x + tile_x * self.TILE_SIZE
+                y = origin_y + tile_y * self.TILE_SIZE
+                current = self.visible.get((tile_x, tile_y))
+                if current and current[1] == key:
+                    self.canvas.coords(current[0], x, y)
+                    continue
+                photo = self.get_tile(key)
+                if photo is None:
+                    missing.append((key, tile_x, tile_y))
+                    if current:
+                        self.canvas.coords(current[0], x, y)
+                    continue
+                if current:
+                    self.canvas.itemconfig(current[0], image=photo)
+                    self.canvas.coords(current[0], x, y)
+                    self.visible[(tile_x, tile_y)] = (current[0], key, photo)
+                else:
+                    item = self.canvas.create_image(x, y, image=photo, anchor="nw", tags=("image",))
+                    self.canvas.tag_lower(item)
+                    self.visible[(tile_x, tile_y)] = (item, key, photo)
+
+        for position in list(self.visible):
+            if position not in wanted:
+                self.canvas.delete(self.visible.pop(position)[0])
+
+        if missing:
+            self.request_tiles(missing, display_zoom, scale, resample)
+        else:
+            self.scheduler.cancel("view")
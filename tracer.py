@@ -0,0 +1,122 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+
+class Span:
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter())
+        return False
+
+
+class Tracer:
+    FPS_WINDOW = 1.0
+
+    def __init__(self, max_events=200000):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.stages = {}
+        self.counters = {}
+        self.frames = deque(maxlen=240)
+        self.threads = {}
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def span(self, name, category="render"):
+        if not self.enabled:
+            return nullcontext()
+        return Span(self, name, category)
+
+    def record(self, name, category, start, end):
+        thread = threading.current_thread()
+        duration = (end - start) * 1000
+        with self.lock:
+            self.threads[thread.ident] = thread.name
+            self.events.append((name, category, start, end, thread.ident))
+            average = self.stages.get(name, (duration, duration))[1]
+            self.stages[name] = (duration, average * 0.9 + duration * 0.1)
+
+    def count(self, name, value=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def frame(self):
+        if self.enabled:
+            self.frames.append(time.perf_counter())
+
+    def fps(self):
+        now = time.perf_counter()
+        recent = [t for t in self.frames if now - t <= self.FPS_WINDOW]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / (recent[-1] - recent[0])
+
+    def hit_rate(self, name):
+        hits = self.counters.get(f"{name}_hit", 0)
+        total = hits + self.counters.get(f"{name}_miss", 0)
+        return hits / total if total else 0.0
+
+    def stage(self, name):
+        return self.stages.get(name, (0.0, 0.0))[0]
+
+    @staticmethod
+    def memory():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss
+        except ImportError:
+            return None
+
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+            self.stages.clear()
+            self.counters.clear()
+            self.frames.clear()
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                 for tid, name in threads.items()]
+        trace.extend({
+            "name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+            "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6
+        } for name, category, start, end, tid in events)
+        return {"traceEvents": trace, "displayTimeUnit": "ms", "otherData": {"counters": dict(self.counters)}}
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def traced(name, category="render"):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name, category):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,17 +1,18 @@
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import customtkinter as ctk
-from PIL import Image, ImageTk
 import time
 import json
 import os
 import math
 import sys
 from controls import ControlPanel
-from dialogs import (ResizeDialog, NoiseDialog, PixelationDialog, VignetteDialog, 
-                    GlowDialog, InvertDialog, EmbossDialog, BlurDialog, 
-                    OilPaintingDialog, SepiaDialog, GrayscaleDialog, PosterizeDialog)
+from dialogs import ResizeDialog, EffectDialog, OperationsDialog, EFFECT_DIALOGS
+from effects import Effects
 from utils import smooth_zoom
+from tile_view import TileView
+from scope_view import ScopeView
+from render_worker import RenderScheduler
 from translator import Translator
 
 def resource_path(relative_path):
@@ -23,12 +24,12 @@ class ImageEditorUI:
     def __init__(self, root, processor):
         self.root = root
         self.processor = processor
+        self.scheduler = RenderScheduler(root)
         self.translator = Translator()
         self.zoom_level = 1.0
         self.target_zoom = 1.0
         self.offset_x = 0
         self.offset_y = 0
-        self.photo = None
         self.welcome_window = None
         self.last_update = 0
         self.dragging = False
@@ -44,8 +45,15 @@ class ImageEditorUI:
         self.last_zoom_time = 0
         self.zoom_debounce_interval = 0.05
         self.is_zooming = False
+        self.hud_visible = False
+        self.pending_operations = None
         self.config_file = "config.json"
         self.load_config()
+        try:
+            self.processor.set_adjustment_order(self.config.get("adjustment_order"))
+            self.processor.set_adjustment_backend(self.config.get("adjustment_backend"))
+        except ValueError as e:
+            print(f"Ошибка в config.json: {e}")
         self.apply_theme()
         self.root.withdraw()
         
@@ -90,6 +98,10 @@ class ImageEditorUI:
             self.load_config()
         self.show_welcome_window()
         self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
+        self.root.bind("<F3>", self.toggle_hud)
+        self.root.bind("<F4>", self.toggle_scopes)
+        self.root.bind("<F12>", self.save_trace)
         self.root.bind("<<ShowLoading>>", lambda e: self.show_loading())
 
     def _(self, text_id, **kwargs):
@@ -115,13 +127,16 @@ class ImageEditorUI:
             ("open", self.open_image),
             ("save", self.processor.save_image),
             ("undo", self.undo),
+            ("redo", self.redo),
             ("resize", self.open_resize_dialog),
+            ("operations", self.open_operations_dialog),
+            ("export_lut", self.processor.export_lut),
             ("settings", self.open_settings_dialog),
             ("exit", self.quit_application)
         ]
 
         self.menu_buttons = {}
-        for text_id, command in buttons[:4]:
+        for text_id, command in buttons[:5]:
             btn = ctk.CTkButton(
                 menu_frame,
                 text="",
@@ -151,7 +166,7 @@ class ImageEditorUI:
         )
         self.effects_menu.pack(side=tk.LEFT, padx=5, pady=3)
 
-        for text_id, command in buttons[4:]:
+        for text_id, command in buttons[5:]:
             btn = ctk.CTkButton(
                 menu_frame,
                 text="",
@@ -175,20 +190,9 @@ class ImageEditorUI:
     def apply_effect(self, choice):
         if choice == self._("effects"):
             return
-        effects_mapping = {
-            self._("color_match"): self.processor.match_colors,
-            self._("noise"): self.open_noise_dialog,
-            self._("pixelation"): self.open_pixelation_dialog,
-            self._("vignette"): self.open_vignette_dialog,
-            self._("glow"): self.open_glow_dialog,
-            self._("invert"): self.open_invert_dialog,
-            self._("emboss"): self.open_emboss_dialog,
-            self._("blur"): self.open_blur_dialog,
-            self._("oil_painting"): self.open_oil_painting_dialog,
-            self._("sepia"): self.open_sepia_dialog,
-            self._("grayscale"): self.open_grayscale_dialog,
-            self._("posterize"): self.open_posterize_dialog
-        }
+        effects_mapping = {self._("color_match"): self.match_colors}
+        for spec in Effects.menu_effects():
+            effects_mapping[self._(spec.label)] = lambda spec=spec: self.open_effect_dialog(spec)
         if choice in effects_mapping:
             effects_mapping[choice]()
         else:
@@ -275,6 +279,8 @@ class ImageEditorUI:
             highlightthickness=0
         )
         self.canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tile_view = TileView(self.canvas, self.processor, self.scheduler, self.show_render_error)
+        self.scope_view = ScopeView(self.canvas, self.processor, self.scheduler, self.show_render_error)
 
         self.canvas.bind("<MouseWheel>", self.zoom)
         self.canvas.bind("<Button-4>", self.zoom)
@@ -400,21 +406,20 @@ class ImageEditorUI:
             self.welcome_window = None
 
     def show_loading(self):
-        if self.is_updating or not self.main_frame:
+        if not self.main_frame:
             return
         self.loading_label.pack(pady=5)
         self.root.config(cursor="wait")
-        self.root.update()
 
     def hide_loading(self):
-        if self.is_updating or not self.main_frame:
+        if not self.main_frame:
             return
         self.loading_label.pack_forget()
         self.root.config(cursor="")
-        self.root.update()
 
     def open_image(self):
         if self.processor.open_image():
+            self.cancel_operations()
             self.close_welcome_window()
             if not self.main_frame:
                 self.create_main_ui()
@@ -423,125 +428,81 @@ class ImageEditorUI:
             self.offset_y = 0
             self.zoom_level = 1.0
             self.target_zoom = 1.0
-            full_img = self.processor.get_processed_image()
-            self.full_img_width, self.full_img_height = full_img.size
+            self.full_img_width, self.full_img_height = self.processor.get_output_size()
             self.update_image()
+            if self.processor.pending_path:
+                self.load_full_image(self.processor.pending_path)
+
+    def load_full_image(self, file_path):
+        def done(image):
+            pending = self.pending_operations
+            operations = self.processor.finish_loading(file_path, image)
+            if operations is None:
+                return
+            if pending is not None:
+                self.scheduler.cancel("effect")
+                operations = tuple(operation.fresh() for operation in pending)
+            if operations:
+                self.run_operations(operations, on_error=self.show_render_error)
+            else:
+                self.update_image()
+
+        self.scheduler.spawn("decode", lambda cancelled: self.processor.decode_image(file_path),
+                             done, self.show_render_error)
 
     def undo(self, event=None):
         if not self.main_frame:
             return
+        self.cancel_operations()
         self.show_loading()
         if self.processor.undo():
             self.update_image()
         self.hide_loading()
 
-    def open_resize_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        ResizeDialog(self.root, self.processor, self.update_image, self)
-
-    def open_noise_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        NoiseDialog(self.root, self.processor, self.update_image, self)
-
-    def open_pixelation_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        PixelationDialog(self.root, self.processor, self.update_image, self)
-
-    def open_vignette_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        VignetteDialog(self.root, self.processor, self.update_image, self)
-
-    def open_glow_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        GlowDialog(self.root, self.processor, self.update_image, self)
-
-    def open_invert_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        InvertDialog(self.root, self.processor, self.update_image, self)
-
-    def open_emboss_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        EmbossDialog(self.root, self.processor, self.update_image, self)
-
-    def open_blur_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
-            return
-        BlurDialog(self.root, self.processor, self.update_image, self)
+    def match_colors(self):
+        self.cancel_operations()
+        if self.processor.match_colors():
+            self.update_image()
 
-    def open_oil_painting_dialog(self):
-        if not self.processor.original_image:
-            messagebox.showwarning(
-                self._("error"),
-                self._("image_not_loaded")
-            )
+    def redo(self, event=None):
+        if not self.main_frame:
             return
-        OilPaintingDialog(self.root, self.processor, self.update_image, self)
+        self.cancel_operations()
+        self.show_loading()
+        if self.processor.redo():
+            self.update_image()
+        self.hide_loading()
 
-    def open_sepia_dialog(self):
+    def open_resize_dialog(self):
         if not self.processor.original_image:
             messagebox.showwarning(
                 self._("error"),
                 self._("image_not_loaded")
             )
             return
-        SepiaDialog(self.root, self.processor, self.update_image, self)
+        ResizeDialog(self.root, self.processor, self.update_image, self)
 
-    def open_grayscale_dialog(self):
+    def open_operations_dialog(self):
         if not self.processor.original_image:
             messagebox.showwarning(
                 self._("error"),
                 self._("image_not_loaded")
             )
             return
-        GrayscaleDialog(self.root, self.processor, self.update_image, self)
+        OperationsDialog(self.root, self.processor, self.update_image, self)
 
-    def open_posterize_dialog(self):
+    def open_effect_dialog(self, spec):
         if not self.processor.original_image:
             messagebox.showwarning(
                 self._("error"),
                 self._("image_not_loaded")
             )
             return
-        PosterizeDialog(self.root, self.processor, self.update_image, self)
+        dialog = EFFECT_DIALOGS.get(spec.name)
+        if dialog:
+            dialog(self.root, self.processor, self.update_image, self)
+        else:
+            EffectDialog(self.root, self.processor, self.update_image, self, spec)
 
     def update_resolution_label(self):
         if self.processor.original_image:
@@ -566,21 +527,8 @@ class ImageEditorUI:
             self.root.title(self._("app_title"))
             for text_id, btn in self.menu_buttons.items():
                 btn.configure(text=self._(text_id))
-            self.effects_menu.configure(values=[
-                self._("effects"),
-                self._("color_match"),
-                self._("noise"),
-                self._("pixelation"),
-                self._("vignette"),
-                self._("glow"),
-                self._("invert"),
-                self._("emboss"),
-                self._("blur"),
-                self._("oil_painting"),
-                self._("sepia"),
-                self._("grayscale"),
-                self._("posterize")
-            ])
+            self.effects_menu.configure(values=[self._("effects"), self._("color_match")] +
+                                            [self._(spec.label) for spec in Effects.menu_effects()])
             self.effects_menu.set(self._("effects"))
             self.loading_label.configure(text=self._("processing"))
             self.update_resolution_label()
@@ -662,165 +610,198 @@ class ImageEditorUI:
         if self.is_updating or not self.processor.image:
             return
         self.update_image()
+        self.scope_view.draw()
+
+    def draw_clip(self, canvas_width, canvas_height):
+        corner_radius = 15
+        points = []
+
+        for i in range(16):
+            angle = math.radians(90 + i * 5.625)
+            x = corner_radius + corner_radius * math.cos(angle)
+            y = corner_radius + corner_radius * math.sin(angle)
+            points.extend([x, y])
+
+        for i in range(16):
+            angle = math.radians(0 + i * 5.625)
+            x = canvas_width - corner_radius + corner_radius * math.cos(angle)
+            y = corner_radius + corner_radius * math.sin(angle)
+            points.extend([x, y])
+
+        for i in range(16):
+            angle = math.radians(270 + i * 5.625)
+            x = canvas_width - corner_radius + corner_radius * math.cos(angle)
+            y = canvas_height - corner_radius + corner_radius * math.sin(angle)
+            points.extend([x, y])
+
+        for i in range(16):
+            angle = math.radians(180 + i * 5.625)
+            x = corner_radius + corner_radius * math.cos(angle)
+            y = canvas_height - corner_radius + corner_radius * math.sin(angle)
+            points.extend([x, y])
+
+        if self.canvas.find_withtag("clip"):
+            self.canvas.coords("clip", *points)
+        else:
+            self.canvas.create_polygon(
+                points,
+                fill="",
+                outline="",
+                tags="clip"
+            )
+            self.canvas.tag_bind("image", "<ButtonPress-1>", self.start_drag)
+            self.canvas.tag_bind("image", "<B1-Motion>", self.drag)
+            self.canvas.tag_bind("image", "<ButtonRelease-1>", self.stop_drag)
+        self.canvas.tag_raise("clip")
+        self.canvas.configure(scrollregion=(0, 0, canvas_width, canvas_height))
 
     def update_image(self, fast_mode=False):
         if self.is_updating or not self.processor.image or not self.canvas:
             return
 
         self.is_updating = True
-        start_time = time.time()
         try:
-            self.show_loading()
-            img = self.processor.get_processed_image(fast_mode=fast_mode)
-            if not img:
-                return
-
-            canvas_width = self.canvas.winfo_width() or 800
-            canvas_height = self.canvas.winfo_height() or 600
-
-            img_width, img_height = self.full_img_width, self.full_img_height
-
-            min_zoom = min(canvas_width / img_width, canvas_height / img_height) / 2
-            if self.zoom_level < min_zoom and not self.dragging:
-                self.zoom_level = min_zoom
-                self.target_zoom = min_zoom
-            self.zoom_level = min(self.zoom_level, 10.0)
-
-            pos_x = canvas_width / 2 + self.offset_x
-            pos_y = canvas_height / 2 + self.offset_y
-
-            scaled_width = int(img_width * self.zoom_level)
-            scaled_height = int(img_height * self.zoom_level)
-
-            img_left = pos_x - scaled_width / 2
-            img_top = pos_y - scaled_height / 2
-            img_right = pos_x + scaled_width / 2
-            img_bottom = pos_y + scaled_height / 2
-
-            visible_left = max(0, img_left)
-            visible_top = max(0, img_top)
-            visible_right = min(canvas_width, img_right)
-            visible_bottom = min(canvas_height, img_bottom)
-
-            if visible_right <= visible_left or visible_bottom <= visible_top:
-                self.canvas.delete("all")
-                return
+            with self.processor.tracer.span("update_image", "ui"):
+                canvas_width = self.canvas.winfo_width() or 800
+                canvas_height = self.canvas.winfo_height() or 600
+
+                img_width, img_height = self.full_img_width, self.full_img_height
+
+                min_zoom = min(canvas_width / img_width, canvas_height / img_height) / 2
+                if self.zoom_level < min_zoom and not self.dragging:
+                    self.zoom_level = min_zoom
+                    self.target_zoom = min_zoom
+                self.zoom_level = min(self.zoom_level, 10.0)
+
+                self.tile_view.draw(
+                    self.zoom_level,
+                    self.offset_x,
+                    self.offset_y,
+                    canvas_width,
+                    canvas_height,
+                    fast_mode=fast_mode,
+                    animating=fast_mode and self.is_zooming
+                )
+                self.draw_clip(canvas_width, canvas_height)
+                self.scope_view.request()
+
+                self.update_resolution_label()
 
-            crop_left = max(0, (visible_left - img_left) / self.zoom_level)
-            crop_top = max(0, (visible_top - img_top) / self.zoom_level)
-            crop_right = min(img_width, (visible_right - img_left) / self.zoom_level)
-            crop_bottom = min(img_height, (visible_bottom - img_top) / self.zoom_level)
-
-            if crop_right <= crop_left or crop_bottom <= crop_top:
-                self.canvas.delete("all")
-                return
+        except Exception as e:
+            self.show_render_error(e)
+        finally:
+            self.processor.tracer.frame()
+            self.is_updating = False
+        if self.hud_visible:
+            self.draw_hud()
 
-            crop_box = (int(crop_left), int(crop_top), int(crop_right), int(crop_bottom))
-            cropped_img = img.crop(crop_box)
+    def toggle_hud(self, event=None):
+        if not self.canvas:
+            return
+        self.hud_visible = not self.hud_visible
+        self.processor.tracer.enabled = self.hud_visible
+        if self.hud_visible:
+            self.processor.tracer.reset()
+            self.refresh_hud()
+        else:
+            self.canvas.delete("hud")
+
+    def toggle_scopes(self, event=None):
+        if self.canvas:
+            self.scope_view.toggle()
+
+    def refresh_hud(self):
+        if self.hud_visible and self.canvas:
+            self.draw_hud()
+            self.root.after(500, self.refresh_hud)
+
+    def draw_hud(self):
+        tracer = self.processor.tracer
+        memory = tracer.memory()
+        text = self._(
+            "hud_stats",
+            frame=f"{tracer.stage('update_image'):.1f}",
+            tiles=f"{tracer.stage('view_tiles'):.1f}",
+            fps=f"{tracer.fps():.0f}",
+            photo=f"{tracer.hit_rate('photo_cache'):.0%}",
+            effects=f"{Effects.cache.hit_rate:.0%}",
+            stages=f"{self.processor.stage_cache.hit_rate:.0%}" if self.processor.stage_cache_enabled
+            else self._("stage_cache_off"),
+            memory="—" if memory is None else f"{memory / 2 ** 20:.0f}"
+        )
+        if self.canvas.find_withtag("hud"):
+            self.canvas.itemconfig("hud", text=text)
+        else:
+            self.canvas.create_text(
+                12, 12,
+                text=text,
+                anchor="nw",
+                font=("Consolas", 10),
+                fill="#00ff7f",
+                tags="hud"
+            )
+        self.canvas.tag_raise("hud")
 
-            crop_width = crop_right - crop_left
-            crop_height = crop_bottom - crop_top
-            new_size = (int(crop_width * self.zoom_level), int(crop_height * self.zoom_level))
+    def save_trace(self, event=None):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")]
+        )
+        if file_path:
+            try:
+                self.processor.tracer.dump(file_path)
+            except Exception as e:
+                messagebox.showerror(self._("error"), self._("trace_error", error=str(e)))
+
+    def show_render_error(self, error):
+        messagebox.showerror(
+            self._("error"),
+            self._("update_image_error", error=str(error))
+        )
 
-            if fast_mode:
-                resized = cropped_img.resize(new_size, Image.Resampling.BILINEAR)
-            else:
-                if self.zoom_level > 1:
-                    resized = cropped_img.resize(new_size, Image.Resampling.LANCZOS)
-                else:
-                    resized = cropped_img.resize(new_size, Image.Resampling.BILINEAR)
-
-            self.photo = ImageTk.PhotoImage(resized)
-
-            self.canvas.delete("all")
-
-            display_pos_x = visible_left
-            display_pos_y = visible_top
-
-            corner_radius = 15
-            points = []
-
-            for i in range(16):
-                angle = math.radians(90 + i * 5.625)
-                x = corner_radius + corner_radius * math.cos(angle)
-                y = corner_radius + corner_radius * math.sin(angle)
-                points.extend([x, y])
-
-            for i in range(16):
-                angle = math.radians(0 + i * 5.625)
-                x = canvas_width - corner_radius + corner_radius * math.cos(angle)
-                y = corner_radius + corner_radius * math.sin(angle)
-                points.extend([x, y])
-
-            for i in range(16):
-                angle = math.radians(270 + i * 5.625)
-                x = canvas_width - corner_radius + corner_radius * math.cos(angle)
-                y = canvas_height - corner_radius + corner_radius * math.sin(angle)
-                points.extend([x, y])
-
-            for i in range(16):
-                angle = math.radians(180 + i * 5.625)
-                x = corner_radius + corner_radius * math.cos(angle)
-                y = canvas_height - corner_radius + corner_radius * math.sin(angle)
-                points.extend([x, y])
-
-            clip_id = self.canvas.create_polygon(
-                points,
-                fill="",
-                outline="",
-                tags="clip"
-            )
+    def run_effect(self, func, *args, on_success=None, on_error=None):
+        if not self.processor.image and not self.processor.original_image:
+            raise ValueError(self._("image_not_loaded"))
+        self.run_operations(self.processor.operations.appended(func, *args, base=self.pending_operations),
+                            on_success, on_error)
 
-            image_id = self.canvas.create_image(
-                display_pos_x,
-                display_pos_y,
-                image=self.photo,
-                anchor="nw"
-            )
+    def current_operations(self):
+        if self.pending_operations is not None:
+            return self.pending_operations
+        return self.processor.operations.operations
 
-            self.canvas.itemconfig(image_id, tags=("image",))
-            self.canvas.tag_lower(image_id, clip_id)
+    def update_effect(self, index, *args, on_success=None, on_error=None):
+        self.run_operations(self.processor.update_operation(index, *args, base=self.pending_operations),
+                            on_success, on_error)
 
-            self.canvas.clip = clip_id
-            self.canvas.image = image_id
-            self.canvas.tag_bind("image", "<ButtonPress-1>", self.start_drag)
-            self.canvas.tag_bind("image", "<B1-Motion>", self.drag)
-            self.canvas.tag_bind("image", "<ButtonRelease-1>", self.stop_drag)
+    def remove_effect(self, index, on_success=None, on_error=None):
+        self.run_operations(self.processor.remove_operation(index, base=self.pending_operations),
+                            on_success, on_error)
 
-            self.canvas.configure(scrollregion=(0, 0, canvas_width, canvas_height))
-            self.canvas.clip_to = lambda: self.canvas.coords(
-                clip_id,
-                *[item for sublist in [
-                    [corner_radius + corner_radius * math.cos(math.radians(90 + i * 5.625)),
-                     corner_radius + corner_radius * math.sin(math.radians(90 + i * 5.625))]
-                    for i in range(16)
-                ] + [
-                    [canvas_width - corner_radius + corner_radius * math.cos(math.radians(0 + i * 5.625)),
-                     corner_radius + corner_radius * math.sin(math.radians(0 + i * 5.625))]
-                    for i in range(16)
-                ] + [
-                    [canvas_width - corner_radius + corner_radius * math.cos(math.radians(270 + i * 5.625)),
-                     canvas_height - corner_radius + corner_radius * math.sin(math.radians(270 + i * 5.625))]
-                    for i in range(16)
-                ] + [
-                    [corner_radius + corner_radius * math.cos(math.radians(180 + i * 5.625)),
-                     canvas_height - corner_radius + corner_radius * math.sin(math.radians(180 + i * 5.625))]
-                    for i in range(16)
-                ] for item in sublist]
-            )
+    def finish_operations(self, operations):
+        if self.pending_operations is operations:
+            self.pending_operations = None
+            self.hide_loading()
 
-            self.canvas.clip_to()
+    def cancel_operations(self):
+        self.scheduler.cancel("effect")
+        if self.pending_operations is not None:
+            self.finish_operations(self.pending_operations)
 
-            self.update_resolution_label()
+    def run_operations(self, operations, on_success=None, on_error=None):
+        def done(image):
+            self.finish_operations(operations)
+            self.processor.commit_operations(operations, image)
+            self.update_image()
+            if on_success:
+                on_success()
 
-            if time.time() - start_time > 5:
-                raise TimeoutError("Image processing took too long")
+        def failed(error):
+            self.finish_operations(operations)
+            if on_error:
+                on_error(error)
 
-        except Exception as e:
-            messagebox.showerror(
-                self._("error"),
-                self._("update_image_error", error=str(e))
-            )
-        finally:
-            self.hide_loading()
-            self.is_updating = False
\ No newline at end of file
+        self.pending_operations = operations
+        self.show_loading()
+        self.scheduler.submit("effect", lambda cancelled: self.processor.operations.render(operations, cancelled),
+                              done, failed, queued=True)
\ No newline at end of file